@@ -23,12 +23,18 @@ class Settings:
     # Server
     HOST: str = "127.0.0.1"
     PORT: int = 8080
+    # Base URL clients use to reach this server (e.g. https://api.example.com or a LAN address)
+    PUBLIC_BASE_URL: str = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+    # Opt-in: vision requests reference stored images by PUBLIC_BASE_URL links instead of
+    # inlining them; only honoured when that URL is reachable from the internet
+    VISION_IMAGES_BY_URL: bool = os.getenv("VISION_IMAGES_BY_URL", "").lower() in ("1", "true", "yes")
     
     # Defaults
     TOP_K_MEMORIES: int = 5
     TOP_K_PREFERENCE_FACTS: int = 10
     RECENT_MEALS_COUNT: int = 5
     SESSION_TTL_HOURS: int = 24
+    CHAT_HISTORY_TOKEN_BUDGET: int = 3000
     
     # Suggestion counts
     MEAL_SUGGESTION_COUNT: int = 3
@@ -42,6 +48,12 @@ class Settings:
     def user_images_dir(cls, user_id: str) -> Path:
         return cls.user_storage_root(user_id) / "images"
 
+    @classmethod
+    def image_url_prefix(cls, user_id: str) -> str:
+        """URL prefix for a user's images (served by GET /images/{user_id}/{filename})"""
+        base_url = cls.PUBLIC_BASE_URL or f"http://{cls.HOST}:{cls.PORT}"
+        return f"{base_url}/images/{user_id}/"
+
     @classmethod
     def user_db_path(cls, user_id: str) -> Path:
         return cls.user_storage_root(user_id) / "sqlite" / "app.db"
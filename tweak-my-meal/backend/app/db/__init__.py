@@ -1 +1 @@
-from .database import Database, get_db
+from .database import Database, get_db, summarize_profile
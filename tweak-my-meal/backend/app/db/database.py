@@ -1,6 +1,7 @@
 """
 SQLite Database Manager with async support
 """
+import asyncio
 import json
 import aiosqlite
 from pathlib import Path
@@ -107,17 +108,60 @@ CREATE TABLE IF NOT EXISTS session_state (
 
 CREATE INDEX IF NOT EXISTS idx_session_updated
   ON session_state(updated_at DESC);
+
+CREATE TABLE IF NOT EXISTS reflections (
+  reflection_id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+  created_at TEXT NOT NULL,
+  text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_reflections_user_created
+  ON reflections(user_id, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS generated_images (
+  user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+  title_key TEXT NOT NULL,
+  image_path TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  PRIMARY KEY (user_id, title_key)
+);
 """
 
+# Reflections kept per user
+MAX_REFLECTIONS = 50
+
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def summarize_profile(profile: Optional[dict]) -> str:
+    """Human-readable profile summary (stored as user_profile.profile_summary)"""
+    if not profile:
+        return "New user - complete onboarding to personalize"
+    
+    parts = []
+    if profile.get("display_name"):
+        parts.append(profile["display_name"])
+    if profile.get("diet_style"):
+        parts.append(profile["diet_style"])
+    if profile.get("cooking_skill"):
+        parts.append(f"{profile['cooking_skill']} cook")
+    if profile.get("goals"):
+        parts.append(f"Goals: {', '.join(profile['goals'][:2])}")
+    if profile.get("allergies"):
+        parts.append(f"Allergies: {', '.join(profile['allergies'])}")
+    
+    return " | ".join(parts) if parts else "Basic profile saved"
+
+
 class Database:
     def __init__(self, db_path: Path):
         self.db_path = db_path
         self._connection: Optional[aiosqlite.Connection] = None
+        # Users already inserted through this connection
+        self._ensured_users: set[str] = set()
 
     async def connect(self):
         # Ensure parent directories exist
@@ -142,6 +186,35 @@ class Database:
         except Exception:
             # Column already exists, ignore
             pass
+        
+        # Add precomputed profile summary column if it doesn't exist
+        try:
+            await self._connection.execute("ALTER TABLE user_profile ADD COLUMN profile_summary TEXT")
+            await self._connection.commit()
+        except Exception:
+            pass
+        
+        # Add stored journal tip columns if they don't exist
+        for column in ("better_bite", "the_science"):
+            try:
+                await self._connection.execute(f"ALTER TABLE meals ADD COLUMN {column} TEXT")
+                await self._connection.commit()
+            except Exception:
+                pass
+        
+        # Move reflections from their old session_state rows into the reflections table
+        await self._connection.execute(
+            r"""INSERT OR IGNORE INTO reflections (reflection_id, user_id, created_at, text)
+               SELECT json_extract(item.value, '$.id'), s.user_id,
+                      json_extract(item.value, '$.created_at'), json_extract(item.value, '$.text')
+               FROM session_state s, json_each(s.state_json, '$.items') AS item
+               WHERE s.session_id LIKE 'reflections\_%' ESCAPE '\'
+                 AND json_extract(item.value, '$.id') IS NOT NULL"""
+        )
+        await self._connection.execute(
+            r"DELETE FROM session_state WHERE session_id LIKE 'reflections\_%' ESCAPE '\'"
+        )
+        await self._connection.commit()
 
     async def close(self):
         if self._connection:
@@ -160,6 +233,8 @@ class Database:
     async def ensure_user(self, user_id: str) -> str:
         """Create user if not exists, return storage_root"""
         storage_root = str(settings.user_storage_root(user_id))
+        if user_id in self._ensured_users:
+            return storage_root
         
         await self.conn.execute(
             """INSERT OR IGNORE INTO users (user_id, created_at, storage_root)
@@ -167,6 +242,7 @@ class Database:
             (user_id, now_iso(), storage_root)
         )
         await self.conn.commit()
+        self._ensured_users.add(user_id)
         return storage_root
 
     async def get_user(self, user_id: str) -> Optional[dict]:
@@ -187,8 +263,8 @@ class Database:
                 user_id, updated_at, display_name, diet_style, goals_json,
                 allergies_json, dislikes_json, likes_json, cooking_skill,
                 time_per_meal_minutes, budget, household_size, equipment_json,
-                units, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                units, notes, profile_summary
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(user_id) DO UPDATE SET
                 updated_at = excluded.updated_at,
                 display_name = excluded.display_name,
@@ -203,7 +279,8 @@ class Database:
                 household_size = excluded.household_size,
                 equipment_json = excluded.equipment_json,
                 units = excluded.units,
-                notes = excluded.notes
+                notes = excluded.notes,
+                profile_summary = excluded.profile_summary
             """,
             (
                 user_id,
@@ -221,6 +298,7 @@ class Database:
                 json.dumps(profile.get("equipment", [])),
                 profile.get("units", "metric"),
                 profile.get("notes"),
+                summarize_profile(profile),
             )
         )
         await self.conn.commit()
@@ -269,6 +347,25 @@ class Database:
         )
         await self.conn.commit()
 
+    async def update_preference_facts_bulk(
+        self, user_id: str, rows: list[tuple[str, float, Optional[str]]]
+    ):
+        """Apply (fact_key, delta, source_meal_id) updates in one transaction."""
+        if not rows:
+            return
+        now = now_iso()
+        await self.conn.executemany(
+            """INSERT INTO preference_facts (user_id, fact_key, strength, last_updated_at, source_meal_id)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(user_id, fact_key) DO UPDATE SET
+                   strength = preference_facts.strength + excluded.strength,
+                   last_updated_at = excluded.last_updated_at,
+                   source_meal_id = COALESCE(excluded.source_meal_id, preference_facts.source_meal_id)
+            """,
+            [(user_id, fact_key, delta, now, source_meal_id) for fact_key, delta, source_meal_id in rows]
+        )
+        await self.conn.commit()
+
     # ========================================================================
     # Meals
     # ========================================================================
@@ -385,6 +482,23 @@ class Database:
         )
         await self.conn.commit()
 
+    async def create_memory_items_bulk(
+        self, user_id: str, rows: list[tuple[str, str, str, float, Optional[str], Optional[str]]]
+    ):
+        """Insert (memory_id, kind, text, salience, source_meal_id, embedding_id) rows in one transaction."""
+        if not rows:
+            return
+        now = now_iso()
+        await self.conn.executemany(
+            """INSERT INTO memory_items (memory_id, user_id, created_at, kind, text, salience, source_meal_id, embedding_id)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (memory_id, user_id, now, kind, text, salience, source_meal_id, embedding_id)
+                for memory_id, kind, text, salience, source_meal_id, embedding_id in rows
+            ]
+        )
+        await self.conn.commit()
+
     async def get_memory_items(self, user_id: str, limit: int = 50) -> list[dict]:
         cursor = await self.conn.execute(
             """SELECT * FROM memory_items WHERE user_id = ? ORDER BY salience DESC LIMIT ?""",
@@ -418,12 +532,82 @@ class Database:
         )
         await self.conn.commit()
 
+    async def patch_session_state(self, session_id: str, patch: dict):
+        """Merge patch into an existing session state in place (JSON merge patch, RFC 7396)"""
+        await self.conn.execute(
+            """UPDATE session_state
+               SET state_json = json_patch(state_json, ?), updated_at = ?
+               WHERE session_id = ?""",
+            (json.dumps(patch), now_iso(), session_id)
+        )
+        await self.conn.commit()
+
     async def delete_session_state(self, session_id: str):
         await self.conn.execute(
             "DELETE FROM session_state WHERE session_id = ?", (session_id,)
         )
         await self.conn.commit()
 
+    # ========================================================================
+    # Reflections
+    # ========================================================================
+
+    async def add_reflection(self, reflection_id: str, user_id: str, text: str) -> dict:
+        """Append a reflection, keeping only the latest MAX_REFLECTIONS for the user"""
+        created_at = now_iso()
+        await self.conn.execute(
+            """INSERT INTO reflections (reflection_id, user_id, created_at, text)
+               VALUES (?, ?, ?, ?)""",
+            (reflection_id, user_id, created_at, text)
+        )
+        await self.conn.execute(
+            """DELETE FROM reflections
+               WHERE user_id = ? AND reflection_id NOT IN (
+                   SELECT reflection_id FROM reflections
+                   WHERE user_id = ? ORDER BY created_at DESC LIMIT ?
+               )""",
+            (user_id, user_id, MAX_REFLECTIONS)
+        )
+        await self.conn.commit()
+        return {"id": reflection_id, "text": text, "created_at": created_at}
+
+    async def get_reflections_since(self, user_id: str, since: datetime) -> list[dict]:
+        """Get reflections created at or after `since`, oldest first"""
+        cursor = await self.conn.execute(
+            """SELECT reflection_id AS id, text, created_at FROM reflections
+               WHERE user_id = ? AND created_at >= ?
+               ORDER BY created_at""",
+            (user_id, since.astimezone(timezone.utc).isoformat())
+        )
+        rows = await cursor.fetchall()
+        return [dict(r) for r in rows]
+
+    # ========================================================================
+    # Generated Images
+    # ========================================================================
+
+    async def get_generated_image(self, user_id: str, title_key: str, since: datetime) -> Optional[str]:
+        """Path of an image generated for this (normalized) suggestion title at or after `since`"""
+        cursor = await self.conn.execute(
+            """SELECT image_path FROM generated_images
+               WHERE user_id = ? AND title_key = ? AND created_at >= ?""",
+            (user_id, title_key, since.astimezone(timezone.utc).isoformat())
+        )
+        row = await cursor.fetchone()
+        return row["image_path"] if row else None
+
+    async def save_generated_image(self, user_id: str, title_key: str, image_path: str):
+        await self.conn.execute(
+            """INSERT INTO generated_images (user_id, title_key, image_path, created_at)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(user_id, title_key) DO UPDATE SET
+                   image_path = excluded.image_path,
+                   created_at = excluded.created_at
+            """,
+            (user_id, title_key, image_path, now_iso())
+        )
+        await self.conn.commit()
+
     # ========================================================================
     # History
     # ========================================================================
@@ -440,29 +624,87 @@ class Database:
             (user_id, limit, offset)
         )
         rows = await cursor.fetchall()
-        result = []
-        for r in rows:
-            d = dict(r)
-            d["tags"] = json.loads(d.pop("tags_json", "[]"))
-            d.pop("outcome_tags_json", None)
-            d["liked"] = bool(d["liked"]) if d["liked"] is not None else None
-            d["cooked_again"] = bool(d["cooked_again"]) if d["cooked_again"] is not None else None
-            # Convert local path to URL-friendly format if exists
-            if d.get("generated_image_path"):
-                d["image_path"] = d["generated_image_path"]
-            result.append(d)
-        return result
+        return [self._history_row(r) for r in rows]
+
+    async def get_meals_since(self, user_id: str, since: datetime, limit: int = 50) -> list[dict]:
+        """
+        Get meals created at or after `since`, newest first (same shape as
+        get_history, plus any stored better_bite / the_science tips)
+        """
+        # created_at is stored as a UTC ISO string, so string comparison orders correctly
+        cursor = await self.conn.execute(
+            """SELECT m.meal_id, m.created_at, m.title, m.tags_json, m.generated_image_path,
+                      m.better_bite, m.the_science,
+                      o.liked, o.cooked_again, o.tags_json as outcome_tags_json
+               FROM meals m
+               LEFT JOIN meal_outcomes o ON m.meal_id = o.meal_id
+               WHERE m.user_id = ? AND m.created_at >= ?
+               ORDER BY m.created_at DESC
+               LIMIT ?""",
+            (user_id, since.astimezone(timezone.utc).isoformat(), limit)
+        )
+        rows = await cursor.fetchall()
+        return [self._history_row(r) for r in rows]
+
+    async def update_meal_tips(self, tips: list[tuple[str, str, str]]):
+        """Store (meal_id, better_bite, the_science) journal tips on their meals"""
+        if not tips:
+            return
+        await self.conn.executemany(
+            "UPDATE meals SET better_bite = ?, the_science = ? WHERE meal_id = ?",
+            [(better_bite, the_science, meal_id) for meal_id, better_bite, the_science in tips]
+        )
+        await self.conn.commit()
+
+    async def get_journal_fingerprint(self, user_id: str, since: datetime) -> tuple:
+        """
+        Cheap summary of everything the weekly journal is built from: the
+        profile, meals and outcomes since `since`, and the reflections.
+        Changes whenever any of them does.
+        """
+        cursor = await self.conn.execute(
+            """SELECT
+                   (SELECT updated_at FROM user_profile WHERE user_id = ?) AS profile_updated_at,
+                   (SELECT COUNT(*) || '|' || MAX(created_at) FROM reflections WHERE user_id = ?) AS reflections,
+                   COUNT(m.meal_id) AS meal_count,
+                   MAX(m.created_at) AS last_meal_at,
+                   group_concat(COALESCE(o.liked, '-') || COALESCE(o.cooked_again, '-'), '') AS outcomes
+               FROM meals m
+               LEFT JOIN meal_outcomes o ON m.meal_id = o.meal_id
+               WHERE m.user_id = ? AND m.created_at >= ?""",
+            (user_id, user_id, user_id, since.astimezone(timezone.utc).isoformat())
+        )
+        return tuple(await cursor.fetchone())
+
+    @staticmethod
+    def _history_row(row: aiosqlite.Row) -> dict:
+        d = dict(row)
+        d["tags"] = json.loads(d.pop("tags_json", "[]"))
+        d.pop("outcome_tags_json", None)
+        d["liked"] = bool(d["liked"]) if d["liked"] is not None else None
+        d["cooked_again"] = bool(d["cooked_again"]) if d["cooked_again"] is not None else None
+        # Convert local path to URL-friendly format if exists
+        if d.get("generated_image_path"):
+            d["image_path"] = d["generated_image_path"]
+        return d
 
 
 # Global database instance (per user for MVP)
 _db_instances: dict[str, Database] = {}
+_db_connect_lock = asyncio.Lock()
 
 
 async def get_db(user_id: str = "user_0001") -> Database:
     """Get or create database instance for user"""
-    if user_id not in _db_instances:
-        db_path = settings.user_db_path(user_id)
-        db = Database(db_path)
-        await db.connect()
-        _db_instances[user_id] = db
+    db = _db_instances.get(user_id)
+    if db is not None:
+        return db
+    
+    # Concurrent first requests for a user must share one connection
+    async with _db_connect_lock:
+        if user_id not in _db_instances:
+            db_path = settings.user_db_path(user_id)
+            db = Database(db_path)
+            await db.connect()
+            _db_instances[user_id] = db
     return _db_instances[user_id]
@@ -2,6 +2,8 @@
 Tweak My Meal - FastAPI Backend
 Main application entry point
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -9,13 +11,30 @@ from fastapi.responses import FileResponse
 from pathlib import Path
 
 from .config import settings
+from .services.http_client import http_client
+from .services import background
 from .routers import user_router, chat_router, feedback_router, history_router, home_router, conversation_router, journal_router
+from .routers.conversation import load_encoding
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks"""
+    # Load (and on first run download) the tokenizer off the event loop,
+    # rather than inside the first /api/conversation/send request
+    await asyncio.to_thread(load_encoding)
+    yield
+    # Let in-flight image downloads finish before closing the pool they use
+    await background.drain()
+    # Release pooled connections
+    await http_client.aclose()
+
 
 # Create app
 app = FastAPI(
     title="Tweak My Meal API",
     description="AI-powered nutrition advisor backend",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS for Flutter Web
@@ -0,0 +1,21 @@
+"""
+Conditional GET helpers - ETag / If-None-Match for polled endpoints
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the JSON form of parts"""
+    fingerprint = json.dumps(parts, sort_keys=True, default=str).encode()
+    return f'"{hashlib.blake2b(fingerprint, digest_size=16).hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Empty 304 response if the client already has this version, else None"""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
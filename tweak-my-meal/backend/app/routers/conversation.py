@@ -4,13 +4,17 @@ Conversation/Chat History API Routes
 import json
 import uuid
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
+import tiktoken
 from fastapi import APIRouter
 from pydantic import BaseModel
 
 from ..schemas.api import ApiResponse
 from ..db import get_db
 from ..services.openai_client import openai_client
+from ..services.context_cache import invalidate_context
+from ..config import settings
 
 router = APIRouter(prefix="/api/conversation", tags=["conversation"])
 
@@ -131,8 +135,8 @@ async def send_message(request: SendMessageRequest):
         # Prepare messages for OpenAI
         ai_messages = [{"role": "system", "content": CHAT_SYSTEM_PROMPT + "\n\n" + context}]
         
-        # Add conversation history (last 20 messages to stay within context)
-        for msg in messages[-20:]:
+        # Add conversation history (most recent messages within the token budget)
+        for msg in _trim_history(messages, settings.CHAT_HISTORY_TOKEN_BUDGET):
             ai_messages.append({"role": msg["role"], "content": msg["content"]})
         
         # Get AI response
@@ -199,6 +203,46 @@ async def clear_chat_history(user_id: str = "user_0001"):
         return ApiResponse.failure("INTERNAL_ERROR", str(e))
 
 
+@lru_cache(maxsize=1)
+def load_encoding() -> Optional[tiktoken.Encoding]:
+    """
+    Load the tokenizer for the chat model once per process (called at startup).
+    Loading may download the BPE file; if that fails, None is cached and
+    history is measured with a character-based estimate instead.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.OPENAI_TEXT_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"Warning: Tokenizer unavailable, estimating tokens from characters: {e}")
+        return None
+
+
+def _count_tokens(encoding: Optional[tiktoken.Encoding], text: str) -> int:
+    if encoding is None:
+        return len(text) // 4  # roughly 4 characters per token for English text
+    # encode_ordinary: user text like "<|endoftext|>" is counted, not rejected
+    return len(encoding.encode_ordinary(text))
+
+
+def _trim_history(messages: list[dict], max_tokens: int) -> list[dict]:
+    """Return the most recent messages whose content fits within max_tokens.
+    
+    The latest message is always kept, even if it exceeds the budget on its own.
+    """
+    encoding = load_encoding()
+    total = 0
+    start = len(messages)
+    while start > 0:
+        total += _count_tokens(encoding, messages[start - 1]["content"])
+        if total > max_tokens and start < len(messages):
+            break
+        start -= 1
+    return messages[start:]
+
+
 def _build_user_context(profile: dict | None, pref_facts: list[dict]) -> str:
     """Build context string from user profile."""
     parts = ["Current user context:"]
@@ -292,5 +336,6 @@ async def _apply_profile_update(db, user_id: str, current_profile: dict | None,
     
     if changed:
         await db.upsert_profile(user_id, profile)
+        invalidate_context(user_id)
     
     return changed
@@ -2,26 +2,75 @@
 Home Screen API Routes - Daily tip, today's meals, suggested bites, etc.
 """
 from datetime import datetime, timezone
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
+import hashlib
+import json
 import uuid
 import asyncio
-import httpx
+import logging
 from pathlib import Path
+from cachetools import TTLCache
+from pydantic import BaseModel
 
 from ..schemas.api import ApiResponse
 from ..db import get_db
 from ..services.openai_client import openai_client
+from ..services.http_client import download_to_file
+from ..services.singleflight import singleflight
+from ..services.background import spawn
+from ..services.context_cache import invalidate_context
+from .conditional import make_etag, not_modified
 from ..config import settings
 
 router = APIRouter(prefix="/api/home", tags=["home"])
+logger = logging.getLogger(__name__)
+
+
+class TweakSelectionRequest(BaseModel):
+    selected_tweaks: list[str] = []
 
 
 # Cache for suggested meals (per user per day)
-_suggested_meals_cache: dict[str, dict] = {}
-# Cache for suggested bite images (suggestion_id -> image_url)
-_suggested_images_cache: dict[str, str] = {}
-# Track ongoing image generation tasks
-_image_generation_tasks: dict[str, bool] = {}
+_suggested_meals_cache: TTLCache = TTLCache(maxsize=10_000, ttl=86_400)
+# Cache for suggested bite images ("{user_id}:{suggestion_id}" -> image_url)
+_suggested_images_cache: TTLCache = TTLCache(maxsize=50_000, ttl=7 * 86_400)
+# Track ongoing image generation tasks ("{user_id}:{suggestion_id}" -> in progress)
+_image_generation_tasks: TTLCache = TTLCache(maxsize=50_000, ttl=86_400)
+# Latest bite image generation task per suggested-bites cache key
+_bite_image_jobs: TTLCache = TTLCache(maxsize=10_000, ttl=3_600)
+# Cache for daily tips ((user_id, date, inputs digest) -> tip)
+_daily_tip_cache: TTLCache = TTLCache(maxsize=10_000, ttl=86_400)
+# Cache for nourish tips ((title, sorted tags) -> tip)
+_nourish_tip_cache: TTLCache = TTLCache(maxsize=10_000, ttl=86_400)
+
+NOURISH_TIP_FALLBACK = "Add a side of vegetables to boost fiber and vitamins."
+DAILY_TIP_FALLBACK = "Eating slowly helps digestion and lets you enjoy each bite more."
+# How long a /suggested-bites request that generated the bites waits for their
+# images before returning without them (home-data and the stream never wait)
+BITE_IMAGE_WAIT_SECONDS = 2.0
+
+# Tip prompts keep the stable parts (system, then user profile) first so the
+# provider's prompt prefix cache can reuse them across requests.
+_SYSTEM_TIPS = "You are a friendly nutrition advisor. Give brief, practical tips."
+_DAILY_TIP_INSTRUCTION = (
+    "Generate a short, helpful nutrition tip (1-2 sentences max). "
+    "Make the tip actionable and encouraging. No emojis."
+)
+
+
+# Different presentation styles for variety in suggested bite images
+_PRESENTATION_FRAGMENTS = (
+    "Served in a artisan ceramic bowl. rustic wooden table, warm natural lighting, overhead shot.",
+    "Served in a modern white plate. marble countertop, soft diffused lighting, 45-degree angle.",
+    "Served in a cast iron skillet. dark slate background, dramatic side lighting, close-up.",
+    "Served in a colorful ceramic plate with fresh herbs. bright kitchen setting, natural window light.",
+)
+
+
+def _image_key(user_id: str, suggestion_id: str) -> str:
+    """Key for the per-user image caches."""
+    return f"{user_id}:{suggestion_id}"
 
 
 @router.get("/daily-tip", response_model=ApiResponse)
@@ -29,51 +78,29 @@ async def get_daily_tip(user_id: str = "user_0001"):
     """
     Get AI-generated daily tip personalized to user profile.
     """
+    now = datetime.now(timezone.utc)
     try:
         db = await get_db(user_id)
         await db.ensure_user(user_id)
         
         # Get user profile for personalization
-        profile = await db.get_profile(user_id)
-        pref_facts = await db.get_top_preference_facts(user_id, limit=5)
-        
-        # Build context for tip generation
-        context_parts = ["Generate a short, helpful nutrition tip (1-2 sentences max)."]
-        
-        if profile:
-            if profile.get("goals"):
-                context_parts.append(f"User goals: {', '.join(profile['goals'])}")
-            if profile.get("diet_style"):
-                context_parts.append(f"Diet style: {profile['diet_style']}")
-            if profile.get("allergies"):
-                context_parts.append(f"Allergies to avoid mentioning: {', '.join(profile['allergies'])}")
-        
-        if pref_facts:
-            likes = [f["fact_key"].replace("likes:", "") for f in pref_facts if f["fact_key"].startswith("likes:")]
-            if likes:
-                context_parts.append(f"User likes: {', '.join(likes[:3])}")
-        
-        context_parts.append("Make the tip actionable and encouraging. No emojis.")
-        
-        prompt = "\n".join(context_parts)
-        
-        messages = [
-            {"role": "system", "content": "You are a friendly nutrition advisor. Give brief, practical tips."},
-            {"role": "user", "content": prompt},
-        ]
+        profile, pref_facts = await asyncio.gather(
+            db.get_profile(user_id),
+            db.get_top_preference_facts(user_id, limit=5),
+        )
         
-        tip = await openai_client.chat(messages=messages, temperature=0.8, max_tokens=100)
+        tip = await _get_daily_tip(user_id, now.date().isoformat(), profile, pref_facts)
         
         return ApiResponse.success({
-            "tip": tip.strip(),
-            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "tip": tip,
+            "generated_at": now.isoformat(),
         })
         
     except Exception as e:
         # Fallback tip if AI fails
         return ApiResponse.success({
-            "tip": "Eating slowly helps digestion and lets you enjoy each bite more.",
-            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "tip": DAILY_TIP_FALLBACK,
+            "generated_at": now.isoformat(),
             "fallback": True,
         })
 
@@ -92,24 +119,23 @@ async def get_todays_meals(user_id: str = "user_0001"):
         today_start = datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
         
         # Get meals from today
-        all_meals = await db.get_history(user_id, limit=50, offset=0)
-        
-        # Filter to today's meals
-        todays_meals = []
-        for meal in all_meals:
-            meal_date = datetime.fromisoformat(meal["created_at"].replace("Z", "+00:00"))
-            if meal_date.date() == today:
-                todays_meals.append({
-                    "meal_id": meal["meal_id"],
-                    "title": meal["title"],
-                    "created_at": meal["created_at"],
-                    "tags": meal.get("tags", []),
-                    "liked": meal.get("liked"),
-                })
-        
-        # Generate nourish tips for each meal
+        todays_rows = await db.get_meals_since(user_id, today_start, limit=50)
+        
+        todays_meals = [
+            {
+                "meal_id": meal["meal_id"],
+                "title": meal["title"],
+                "created_at": meal["created_at"],
+                "tags": meal.get("tags", []),
+                "liked": meal.get("liked"),
+            }
+            for meal in todays_rows
+        ]
+        
+        # Generate nourish tips for all meals in one request
+        tips = await _generate_nourish_tips_batch(todays_meals)
         for meal in todays_meals:
-            meal["nourish_tip"] = await _generate_nourish_tip(meal["title"], meal.get("tags", []))
+            meal["nourish_tip"] = tips.get(meal["meal_id"], NOURISH_TIP_FALLBACK)
         
         return ApiResponse.success({
             "date": today.isoformat(),
@@ -121,21 +147,65 @@ async def get_todays_meals(user_id: str = "user_0001"):
         return ApiResponse.failure("INTERNAL_ERROR", str(e))
 
 
-async def _generate_nourish_tip(meal_title: str, tags: list[str]) -> str:
-    """Generate a nourish tip for a specific meal."""
+def _nourish_tip_key(meal: dict) -> tuple:
+    return (meal["title"], tuple(sorted(meal.get("tags") or [])))
+
+
+async def _generate_nourish_tips_batch(meals: list[dict]) -> dict[str, str]:
+    """Generate nourish tips for all meals in a single request, keyed by meal_id.
+    
+    Tips are a pure function of title and tags, so cached tips are reused and
+    only the remaining meals are sent to the model.
+    """
+    tips = {}
+    missing = []
+    for meal in meals:
+        cached = _nourish_tip_cache.get(_nourish_tip_key(meal))
+        if cached:
+            tips[meal["meal_id"]] = cached
+        else:
+            missing.append(meal)
+    
+    if not missing:
+        return tips
+    
     try:
-        prompt = f"Give one brief tip (1 sentence) to make '{meal_title}' healthier or more nutritious. Be specific and actionable. No emojis."
+        meal_lines = []
+        for i, meal in enumerate(missing, start=1):
+            line = f"{i}. meal_id={meal['meal_id']}: {meal['title']}"
+            if meal.get("tags"):
+                line += f" (tags: {', '.join(meal['tags'])})"
+            meal_lines.append(line)
+        
+        prompt = (
+            "For each meal below, give one brief tip (1 sentence) to make it healthier or more nutritious. "
+            "Be specific and actionable. No emojis.\n\n"
+            + "\n".join(meal_lines)
+            + '\n\nReturn JSON: {"tips": [{"meal_id": "...", "tip": "..."}]} with one entry per meal.'
+        )
         
         messages = [
-            {"role": "system", "content": "You are a nutrition advisor. Give brief, practical tips."},
+            {"role": "system", "content": _SYSTEM_TIPS},
             {"role": "user", "content": prompt},
         ]
         
-        tip = await openai_client.chat(messages=messages, temperature=0.7, max_tokens=80)
-        return tip.strip()
+        result = await openai_client.chat_json(messages=messages, temperature=0.7, max_tokens=80 * len(missing) + 50)
+        
+        generated = {}
+        for item in result.get("tips", []):
+            if isinstance(item, dict) and item.get("meal_id") and item.get("tip"):
+                generated[str(item["meal_id"])] = str(item["tip"]).strip()
+        
+        for meal in missing:
+            tip = generated.get(meal["meal_id"])
+            if tip:
+                tips[meal["meal_id"]] = tip
+                _nourish_tip_cache[_nourish_tip_key(meal)] = tip
         
     except Exception:
-        return "Add a side of vegetables to boost fiber and vitamins."
+        pass
+    
+    return tips
 
 
 @router.get("/home-data", response_model=ApiResponse)
@@ -147,43 +217,35 @@ async def get_home_data(user_id: str = "user_0001"):
         db = await get_db(user_id)
         await db.ensure_user(user_id)
         
-        # Get profile
-        profile = await db.get_profile(user_id)
-        display_name = profile.get("display_name") if profile else None
-        
-        # Get today's meals
         today = datetime.now(timezone.utc).date()
-        all_meals = await db.get_history(user_id, limit=20, offset=0)
-        
-        todays_meals = []
-        for meal in all_meals:
-            meal_date = datetime.fromisoformat(meal["created_at"].replace("Z", "+00:00"))
-            if meal_date.date() == today:
-                todays_meals.append({
-                    "meal_id": meal["meal_id"],
-                    "title": meal["title"],
-                    "created_at": meal["created_at"],
-                    "tags": meal.get("tags", []),
-                    "image_url": meal.get("generated_image_path"),
-                })
-        
-        # Generate nourish tips
-        for meal in todays_meals:
-            meal["nourish_tip"] = await _generate_nourish_tip(meal["title"], meal.get("tags", []))
-        
-        # Generate daily tip
-        pref_facts = await db.get_top_preference_facts(user_id, limit=5)
-        daily_tip = await _generate_daily_tip(profile, pref_facts)
+        today_start = datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+        today_iso = today.isoformat()
+        
+        # Get profile, today's meals and preferences
+        profile, todays_rows, pref_facts = await asyncio.gather(
+            db.get_profile(user_id),
+            db.get_meals_since(user_id, today_start, limit=20),
+            db.get_top_preference_facts(user_id, limit=5),
+        )
+        display_name = profile.get("display_name") if profile else None
         
-        # Get suggested bites (use cache if available)
-        suggested_response = await get_suggested_bites(user_id, refresh=False)
-        suggested_bites = suggested_response.data.get("suggestions", []) if suggested_response.ok else []
+        todays_meals = [
+            {
+                "meal_id": meal["meal_id"],
+                "title": meal["title"],
+                "created_at": meal["created_at"],
+                "tags": meal.get("tags", []),
+                "image_url": meal.get("generated_image_path"),
+            }
+            for meal in todays_rows
+        ]
         
-        # Attach any generated images
-        for bite in suggested_bites:
-            sid = bite.get("suggestion_id", "")
-            if sid in _suggested_images_cache and not bite.get("image_url"):
-                bite["image_url"] = _suggested_images_cache[sid]
+        # Nourish tips, daily tip and suggested bites (cached if available) are independent
+        todays_meals, daily_tip, suggested_bites = await asyncio.gather(
+            _todays_meals_section(todays_meals),
+            _daily_tip_section(user_id, today_iso, profile, pref_facts),
+            _suggested_bites_section(user_id, today_iso),
+        )
         
         return ApiResponse.success({
             "user": {
@@ -193,40 +255,181 @@ async def get_home_data(user_id: str = "user_0001"):
             "daily_tip": daily_tip,
             "todays_meals": todays_meals,
             "suggested_bites": suggested_bites,
-            "date": today.isoformat(),
+            "date": today_iso,
         })
         
     except Exception as e:
         return ApiResponse.failure("INTERNAL_ERROR", str(e))
 
 
-async def _generate_daily_tip(profile: dict | None, pref_facts: list[dict]) -> str:
-    """Generate personalized daily tip."""
-    try:
-        context_parts = ["Generate a short, helpful nutrition tip (1-2 sentences max)."]
+@router.get("/home-data/stream")
+async def stream_home_data(user_id: str = "user_0001"):
+    """
+    Stream home screen data as Server-Sent Events.
+    
+    Emits a "section" event for "user" immediately, then for "todays_meals",
+    "daily_tip" and "suggested_bites" as each one resolves, and finally a
+    "done" event. Each section payload matches the field of the same name in
+    /home-data.
+    """
+    async def event_stream():
+        try:
+            db = await get_db(user_id)
+            await db.ensure_user(user_id)
+            
+            today = datetime.now(timezone.utc).date()
+            today_start = datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+            today_iso = today.isoformat()
+            
+            profile, todays_rows, pref_facts = await asyncio.gather(
+                db.get_profile(user_id),
+                db.get_meals_since(user_id, today_start, limit=20),
+                db.get_top_preference_facts(user_id, limit=5),
+            )
+        except Exception as e:
+            yield _sse_event("error", {"code": "INTERNAL_ERROR", "message": str(e)})
+            return
         
-        if profile:
-            if profile.get("goals"):
-                context_parts.append(f"User goals: {', '.join(profile['goals'])}")
-            if profile.get("diet_style"):
-                context_parts.append(f"Diet style: {profile['diet_style']}")
+        yield _sse_event("section", {
+            "section": "user",
+            "data": {
+                "display_name": profile.get("display_name") if profile else None,
+                "has_profile": profile is not None,
+            },
+        })
         
-        if pref_facts:
-            likes = [f["fact_key"].replace("likes:", "") for f in pref_facts if f["fact_key"].startswith("likes:")]
-            if likes:
-                context_parts.append(f"User likes: {', '.join(likes[:3])}")
+        todays_meals = [
+            {
+                "meal_id": meal["meal_id"],
+                "title": meal["title"],
+                "created_at": meal["created_at"],
+                "tags": meal.get("tags", []),
+                "image_url": meal.get("generated_image_path"),
+            }
+            for meal in todays_rows
+        ]
         
-        context_parts.append("Make the tip actionable and encouraging. No emojis.")
+        async def named(section: str, coro):
+            return section, await coro
         
-        messages = [
-            {"role": "system", "content": "You are a friendly nutrition advisor. Give brief, practical tips."},
-            {"role": "user", "content": "\n".join(context_parts)},
+        pending = [
+            named("todays_meals", _todays_meals_section(todays_meals)),
+            named("daily_tip", _daily_tip_section(user_id, today_iso, profile, pref_facts)),
+            named("suggested_bites", _suggested_bites_section(user_id, today_iso)),
         ]
+        for next_done in asyncio.as_completed(pending):
+            section, data = await next_done
+            yield _sse_event("section", {"section": section, "data": data})
         
-        return (await openai_client.chat(messages=messages, temperature=0.8, max_tokens=100)).strip()
-        
+        yield _sse_event("done", {"date": today_iso})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+def _sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def _todays_meals_section(todays_meals: list[dict]) -> list[dict]:
+    """Attach nourish tips to today's meals, falling back per meal."""
+    try:
+        tips = await _generate_nourish_tips_batch(todays_meals)
+    except Exception:
+        tips = {}
+    for meal in todays_meals:
+        meal["nourish_tip"] = tips.get(meal["meal_id"], NOURISH_TIP_FALLBACK)
+    return todays_meals
+
+
+async def _daily_tip_section(
+    user_id: str, today_iso: str, profile: dict | None, pref_facts: list[dict]
+) -> str:
+    try:
+        return await _get_daily_tip(user_id, today_iso, profile, pref_facts)
     except Exception:
-        return "Eating slowly helps digestion and lets you enjoy each bite more."
+        return DAILY_TIP_FALLBACK
+
+
+async def _suggested_bites_section(user_id: str, today_iso: str) -> list[dict]:
+    """Suggested bites (cached if available) with any generated images attached."""
+    try:
+        suggested_response = await _get_suggested_bites(user_id, today_iso, refresh=False)
+    except Exception:
+        return []
+    if not suggested_response.ok:
+        return []
+    
+    suggested_bites = suggested_response.data.get("suggestions", [])
+    for bite in suggested_bites:
+        image_key = _image_key(user_id, bite.get("suggestion_id", ""))
+        if image_key in _suggested_images_cache and not bite.get("image_url"):
+            bite["image_url"] = _suggested_images_cache[image_key]
+    return suggested_bites
+
+
+async def _get_daily_tip(
+    user_id: str, today_iso: str, profile: dict | None, pref_facts: list[dict]
+) -> str:
+    """Return today's tip for these inputs, generating it only on a cache miss."""
+    digest = hashlib.blake2b(
+        json.dumps([profile, pref_facts], sort_keys=True, default=str).encode(),
+        digest_size=16,
+    ).hexdigest()
+    cache_key = (user_id, today_iso, digest)
+    
+    if cache_key in _daily_tip_cache:
+        return _daily_tip_cache[cache_key]
+    
+    tip = await singleflight(
+        "daily-tip:" + ":".join(cache_key),
+        lambda: _generate_daily_tip(profile, pref_facts),
+    )
+    _daily_tip_cache[cache_key] = tip
+    return tip
+
+
+def _extract_likes(pref_facts: list[dict], n: int) -> list[str]:
+    """First n "likes:" preference facts, without the prefix."""
+    likes = []
+    for fact in pref_facts:
+        key = fact["fact_key"]
+        if key.startswith("likes:"):
+            likes.append(key[6:])
+            if len(likes) == n:
+                break
+    return likes
+
+
+def _profile_block(profile: dict | None, pref_facts: list[dict]) -> str:
+    """Deterministic user context for tip prompts (same inputs -> same text)."""
+    context_parts = []
+    
+    if profile:
+        if profile.get("goals"):
+            context_parts.append(f"User goals: {', '.join(profile['goals'])}")
+        if profile.get("diet_style"):
+            context_parts.append(f"Diet style: {profile['diet_style']}")
+        if profile.get("allergies"):
+            context_parts.append(f"Allergies to avoid mentioning: {', '.join(profile['allergies'])}")
+    
+    likes = _extract_likes(pref_facts, 3)
+    if likes:
+        context_parts.append(f"User likes: {', '.join(likes)}")
+    
+    if not context_parts:
+        return "User profile: not set up yet."
+    return "User profile:\n" + "\n".join(context_parts)
+
+
+async def _generate_daily_tip(profile: dict | None, pref_facts: list[dict]) -> str:
+    """Generate personalized daily tip. Raises if the model call fails."""
+    messages = [
+        {"role": "system", "content": _SYSTEM_TIPS},
+        {"role": "user", "content": _profile_block(profile, pref_facts)},
+        {"role": "user", "content": _DAILY_TIP_INSTRUCTION},
+    ]
+    
+    return (await openai_client.chat(messages=messages, temperature=0.8, max_tokens=100)).strip()
 
 
 @router.get("/suggested-bites", response_model=ApiResponse)
@@ -235,47 +438,78 @@ async def get_suggested_bites(user_id: str = "user_0001", refresh: bool = False)
     Get AI-suggested meals for today based on user preferences.
     These are suggestions the user can tweak and log.
     """
-    global _suggested_meals_cache
-    
+    return await _get_suggested_bites(
+        user_id, datetime.now(timezone.utc).date().isoformat(), refresh, wait_for_images=True
+    )
+
+
+async def _get_suggested_bites(
+    user_id: str, today: str, refresh: bool, wait_for_images: bool = False
+) -> ApiResponse:
+    """
+    Suggested bites for the given UTC day (ISO date), from cache unless refreshing.
+    With wait_for_images, a fresh generation waits briefly for its images.
+    """
     try:
-        today = datetime.now(timezone.utc).date().isoformat()
         cache_key = f"{user_id}_{today}"
         
         # Return cached if available and not forcing refresh
         if not refresh and cache_key in _suggested_meals_cache:
             return ApiResponse.success(_suggested_meals_cache[cache_key])
         
-        db = await get_db(user_id)
-        await db.ensure_user(user_id)
-        
-        profile = await db.get_profile(user_id)
-        pref_facts = await db.get_top_preference_facts(user_id, limit=10)
+        # Concurrent cache misses for the same user/day share one generation
+        result_data = await singleflight(
+            f"suggested-bites:{cache_key}:{refresh}",
+            lambda: _build_suggested_bites(user_id, today, cache_key),
+        )
+        if wait_for_images:
+            await _wait_for_bite_images(user_id, cache_key, result_data)
         
-        # Build context for meal suggestions
-        context_parts = []
-        
-        if profile:
-            if profile.get("goals"):
-                context_parts.append(f"Goals: {', '.join(profile['goals'])}")
-            if profile.get("diet_style"):
-                context_parts.append(f"Diet: {profile['diet_style']}")
-            if profile.get("allergies"):
-                context_parts.append(f"AVOID (allergies): {', '.join(profile['allergies'])}")
-            if profile.get("dislikes"):
-                context_parts.append(f"Dislikes: {', '.join(profile['dislikes'])}")
-            if profile.get("likes"):
-                context_parts.append(f"Likes: {', '.join(profile['likes'])}")
-            if profile.get("cooking_skill"):
-                context_parts.append(f"Skill: {profile['cooking_skill']}")
-        
-        if pref_facts:
-            likes = [f["fact_key"].replace("likes:", "") for f in pref_facts if f["fact_key"].startswith("likes:")]
-            if likes:
-                context_parts.append(f"Learned preferences: {', '.join(likes[:5])}")
-        
-        context = "\n".join(context_parts) if context_parts else "No specific preferences known yet - suggest popular healthy options."
+        return ApiResponse.success(result_data)
         
-        prompt = f"""Generate exactly 2 personalized healthy meal suggestions for today.
+    except Exception as e:
+        logger.exception("suggested-bites failed: %s", e)
+        return ApiResponse.success({
+            "suggestions": _get_fallback_suggestions(),
+            "date": today,
+            "fallback": True,
+        })
+
+
+async def _build_suggested_bites(user_id: str, today: str, cache_key: str) -> dict:
+    """Generate today's suggested bites, cache them and kick off image generation."""
+    db = await get_db(user_id)
+    await db.ensure_user(user_id)
+    
+    profile, pref_facts = await asyncio.gather(
+        db.get_profile(user_id),
+        db.get_top_preference_facts(user_id, limit=10),
+    )
+    
+    # Build context for meal suggestions
+    context_parts = []
+    
+    if profile:
+        if profile.get("goals"):
+            context_parts.append(f"Goals: {', '.join(profile['goals'])}")
+        if profile.get("diet_style"):
+            context_parts.append(f"Diet: {profile['diet_style']}")
+        if profile.get("allergies"):
+            context_parts.append(f"AVOID (allergies): {', '.join(profile['allergies'])}")
+        if profile.get("dislikes"):
+            context_parts.append(f"Dislikes: {', '.join(profile['dislikes'])}")
+        if profile.get("likes"):
+            context_parts.append(f"Likes: {', '.join(profile['likes'])}")
+        if profile.get("cooking_skill"):
+            context_parts.append(f"Skill: {profile['cooking_skill']}")
+    
+    likes = _extract_likes(pref_facts, 5)
+    if likes:
+        context_parts.append(f"Learned preferences: {', '.join(likes)}")
+    
+    context = "\n".join(context_parts) if context_parts else "No specific preferences known yet - suggest popular healthy options."
+    
+    prompt = f"""Generate exactly 2 personalized healthy meal suggestions for today.
 
 User Context:
 {context}
@@ -291,82 +525,93 @@ Return a JSON array with exactly 2 objects. Each object must have:
 Make suggestions visually distinct - different cuisines, colors, presentations.
 Example format: [{{"title": "...", "summary": "...", ...}}, {{"title": "...", ...}}]"""
 
-        messages = [
-            {"role": "system", "content": "You are a nutrition expert. Always respond with valid JSON arrays only, no markdown."},
-            {"role": "user", "content": prompt},
-        ]
-        
-        result = await openai_client.chat_json(messages=messages, temperature=0.8)
-        print(f"DEBUG suggested-bites raw result: {result}")
-        
-        # Normalize result - could be array or object with suggestions key
-        if isinstance(result, list):
-            suggestions = result
-        elif isinstance(result, dict):
-            suggestions = result.get("suggestions", result.get("meals", [result]))
-        else:
-            suggestions = []
-        
-        # Add IDs and ensure structure
-        processed = []
-        for i, s in enumerate(suggestions[:2]):
-            if not isinstance(s, dict):
-                continue
-            suggestion_id = f"daily_{uuid.uuid4().hex[:8]}"
-            title = s.get("title", "")
-            if not title or title == "":
-                continue
-                
-            processed.append({
-                "suggestion_id": suggestion_id,
-                "title": title,
-                "summary": s.get("summary", "A delicious and nutritious meal option."),
-                "key_ingredients": s.get("key_ingredients", ["vegetables", "protein", "whole grains"]),
-                "tweak_options": s.get("tweak_options", ["Add more protein", "Include vegetables", "Use healthy fats"]),
-                "tags": s.get("tags", ["healthy"]),
-                "science_note": s.get("science_note", "This meal provides balanced nutrition for sustained energy."),
-                "image_url": None,
-            })
-        
-        # If we didn't get good suggestions, use quality fallbacks
-        if len(processed) < 2:
-            processed = _get_fallback_suggestions()
-        
-        # Check for cached images and attach them
-        for suggestion in processed:
-            sid = suggestion.get("suggestion_id", "")
-            if sid in _suggested_images_cache:
-                suggestion["image_url"] = _suggested_images_cache[sid]
-        
-        result_data = {
-            "suggestions": processed,
-            "date": today,
-        }
-        
-        # Cache for today (but can be refreshed)
-        _suggested_meals_cache[cache_key] = result_data
-        
-        # Start image generation in background if not already generating
-        suggestions_needing_images = [
-            s for s in processed 
-            if s.get("suggestion_id") and not s.get("image_url")
-            and s.get("suggestion_id") not in _image_generation_tasks
-        ]
-        
-        if suggestions_needing_images:
-            for s in suggestions_needing_images:
-                _image_generation_tasks[s["suggestion_id"]] = True
-            asyncio.create_task(_generate_bite_images(user_id, suggestions_needing_images))
-        
-        return ApiResponse.success(result_data)
-        
-    except Exception as e:
-        print(f"ERROR in suggested-bites: {e}")
-        return ApiResponse.success({
-            "suggestions": _get_fallback_suggestions(),
-            "date": datetime.now(timezone.utc).date().isoformat(),
-            "fallback": True,
+    messages = [
+        {"role": "system", "content": "You are a nutrition expert. Always respond with valid JSON arrays only, no markdown."},
+        {"role": "user", "content": prompt},
+    ]
+    
+    result = await openai_client.chat_json(messages=messages, temperature=0.8)
+    logger.debug("suggested-bites raw result: %s", result)
+    
+    # Normalize result - could be array or object with suggestions key
+    if isinstance(result, list):
+        suggestions = result
+    elif isinstance(result, dict):
+        suggestions = result.get("suggestions", result.get("meals", [result]))
+    else:
+        suggestions = []
+    
+    # Add IDs and ensure structure
+    processed = []
+    for i, s in enumerate(suggestions[:2]):
+        if not isinstance(s, dict):
+            continue
+        suggestion_id = f"daily_{uuid.uuid4().hex[:8]}"
+        title = s.get("title", "")
+        if not title or title == "":
+            continue
+            
+        processed.append({
+            "suggestion_id": suggestion_id,
+            "title": title,
+            "summary": s.get("summary", "A delicious and nutritious meal option."),
+            "key_ingredients": s.get("key_ingredients", ["vegetables", "protein", "whole grains"]),
+            "tweak_options": s.get("tweak_options", ["Add more protein", "Include vegetables", "Use healthy fats"]),
+            "tags": s.get("tags", ["healthy"]),
+            "science_note": s.get("science_note", "This meal provides balanced nutrition for sustained energy."),
+            "image_url": None,
         })
+    
+    # If we didn't get good suggestions, use quality fallbacks
+    if len(processed) < 2:
+        processed = _get_fallback_suggestions()
+    
+    # Check for cached images and attach them
+    for suggestion in processed:
+        image_key = _image_key(user_id, suggestion.get("suggestion_id", ""))
+        if image_key in _suggested_images_cache:
+            suggestion["image_url"] = _suggested_images_cache[image_key]
+    
+    result_data = {
+        "suggestions": processed,
+        "date": today,
+    }
+    
+    # Cache for today (but can be refreshed)
+    _suggested_meals_cache[cache_key] = result_data
+    
+    # Start image generation in background if not already generating
+    suggestions_needing_images = [
+        s for s in processed 
+        if s.get("suggestion_id") and not s.get("image_url")
+        and _image_key(user_id, s["suggestion_id"]) not in _image_generation_tasks
+    ]
+    
+    if suggestions_needing_images:
+        for s in suggestions_needing_images:
+            _image_generation_tasks[_image_key(user_id, s["suggestion_id"])] = True
+        _bite_image_jobs[cache_key] = spawn(_generate_bite_images(user_id, suggestions_needing_images))
+    
+    return result_data
+
+
+async def _wait_for_bite_images(user_id: str, cache_key: str, result_data: dict):
+    """
+    Wait briefly so fast image generations make it into this response;
+    otherwise the task keeps running and the client polls /bite-images
+    """
+    task = _bite_image_jobs.get(cache_key)
+    if task is None:
+        return
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=BITE_IMAGE_WAIT_SECONDS)
+    except Exception:
+        pass  # still running (or failed); the bites are returned without images
+    
+    for suggestion in result_data["suggestions"]:
+        image_key = _image_key(user_id, suggestion.get("suggestion_id", ""))
+        if not suggestion.get("image_url") and image_key in _suggested_images_cache:
+            suggestion["image_url"] = _suggested_images_cache[image_key]
 
 
 def _get_fallback_suggestions() -> list[dict]:
@@ -397,23 +642,15 @@ def _get_fallback_suggestions() -> list[dict]:
 
 async def _generate_bite_images(user_id: str, suggestions: list[dict]):
     """Background task to generate images for suggested bites"""
-    global _suggested_images_cache, _image_generation_tasks
-    
-    # Different presentation styles for variety
-    presentation_styles = [
-        ("rustic wooden table, warm natural lighting, overhead shot", "artisan ceramic bowl"),
-        ("marble countertop, soft diffused lighting, 45-degree angle", "modern white plate"),
-        ("dark slate background, dramatic side lighting, close-up", "cast iron skillet"),
-        ("bright kitchen setting, natural window light", "colorful ceramic plate with fresh herbs"),
-    ]
-    
     async def generate_one(suggestion: dict, index: int):
         suggestion_id = suggestion.get("suggestion_id", "")
         title = suggestion.get("title", "Healthy Meal")
         key_ingredients = suggestion.get("key_ingredients", [])
         
+        image_key = _image_key(user_id, suggestion_id)
+        
         # Skip if already generated
-        if suggestion_id in _suggested_images_cache:
+        if image_key in _suggested_images_cache:
             return
         
         try:
@@ -423,12 +660,11 @@ async def _generate_bite_images(user_id: str, suggestions: list[dict]):
                 ingredients_desc = f" featuring visible {', '.join(key_ingredients[:4])}"
             
             # Vary the presentation style
-            style_idx = index % len(presentation_styles)
-            background, plating = presentation_styles[style_idx]
+            style = _PRESENTATION_FRAGMENTS[index % len(_PRESENTATION_FRAGMENTS)]
             
             prompt = (
                 f"Professional food photography of {title}{ingredients_desc}. "
-                f"Served in a {plating}. {background}. "
+                f"{style} "
                 f"Appetizing, realistic, restaurant-quality presentation. "
                 f"Sharp focus on the food, vibrant colors, no text or labels or watermarks."
             )
@@ -440,23 +676,23 @@ async def _generate_bite_images(user_id: str, suggestions: list[dict]):
                 # Download and save locally
                 local_path = await _download_and_save_image(user_id, dalle_url, suggestion_id)
                 if local_path:
-                    filename = Path(local_path).name
-                    local_url = f"http://127.0.0.1:8080/images/{user_id}/{filename}"
-                    _suggested_images_cache[suggestion_id] = local_url
-                    print(f"Generated image for {title}: {local_url}")
+                    local_url = settings.image_url_prefix(user_id) + Path(local_path).name
+                    _suggested_images_cache[image_key] = local_url
+                    logger.info("Generated image for %s: %s", title, local_url)
                     
         except Exception as e:
-            print(f"Failed to generate image for {title}: {e}")
+            logger.warning("Failed to generate image for %s: %s", title, e)
     
     # Generate images in parallel
     tasks = [generate_one(s, i) for i, s in enumerate(suggestions)]
-    await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Mark generation complete
-    for s in suggestions:
-        sid = s.get("suggestion_id", "")
-        if sid:
-            _image_generation_tasks[sid] = False
+    try:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        # Mark generation complete, even if cancelled, so /bite-images stops reporting it
+        for s in suggestions:
+            sid = s.get("suggestion_id", "")
+            if sid:
+                _image_generation_tasks[_image_key(user_id, sid)] = False
 
 
 async def _download_and_save_image(user_id: str, image_url: str, suggestion_id: str) -> str | None:
@@ -465,31 +701,43 @@ async def _download_and_save_image(user_id: str, image_url: str, suggestion_id:
         images_dir = settings.user_images_dir(user_id)
         images_dir.mkdir(parents=True, exist_ok=True)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(image_url, timeout=30.0)
-            if response.status_code == 200:
-                filename = f"bite_{suggestion_id}.jpg"
-                path = images_dir / filename
-                with open(path, "wb") as f:
-                    f.write(response.content)
-                return str(path)
+        path = images_dir / f"bite_{suggestion_id}.jpg"
+        if await download_to_file(image_url, path):
+            return str(path)
     except Exception as e:
-        print(f"Failed to download image: {e}")
+        logger.warning("Failed to download image: %s", e)
     return None
 
 
 @router.get("/bite-images", response_model=ApiResponse)
-async def get_bite_images(user_id: str = "user_0001"):
+async def get_bite_images(request: Request, response: Response, user_id: str = "user_0001"):
     """
     Get generated images for suggested bites.
-    Frontend can poll this to get images as they're generated.
+    Frontend can poll this to get images as they're generated; polls that
+    send back the last ETag get an empty 304 until something changes.
     """
-    global _suggested_images_cache
+    prefix = _image_key(user_id, "")
+    
+    # Return only cached images for this user's suggestions
+    images = {
+        key[len(prefix):]: url
+        for key, url in _suggested_images_cache.items()
+        if key.startswith(prefix)
+    }
+    generating = any(
+        in_progress
+        for key, in_progress in _image_generation_tasks.items()
+        if key.startswith(prefix)
+    )
+    
+    etag = make_etag(images, generating)
+    if cached := not_modified(request, etag):
+        return cached
+    response.headers["ETag"] = etag
     
-    # Return all cached images for this user's suggestions
     return ApiResponse.success({
-        "images": _suggested_images_cache,
-        "generating": any(_image_generation_tasks.values()),
+        "images": images,
+        "generating": generating,
     })
 
 
@@ -499,23 +747,20 @@ async def refresh_suggestions(user_id: str = "user_0001"):
     Force refresh suggested bites based on updated preferences.
     Called after profile changes or chat updates.
     """
-    global _suggested_meals_cache
-    
     # Clear cache for this user
     today = datetime.now(timezone.utc).date().isoformat()
     cache_key = f"{user_id}_{today}"
     if cache_key in _suggested_meals_cache:
         del _suggested_meals_cache[cache_key]
     
+    # Preferences may have changed, so today's tip should be regenerated too
+    for tip_key in [key for key in _daily_tip_cache if key[0] == user_id]:
+        _daily_tip_cache.pop(tip_key, None)
+    
     # Return fresh suggestions
-    return await get_suggested_bites(user_id, refresh=True)
+    return await _get_suggested_bites(user_id, today, refresh=True)
 
 
-from pydantic import BaseModel as TweakSelectionBase
-
-class TweakSelectionRequest(TweakSelectionBase):
-    selected_tweaks: list[str] = []
-
 @router.post("/tweak-selection", response_model=ApiResponse)
 async def save_tweak_selection(
     request: TweakSelectionRequest,
@@ -529,16 +774,13 @@ async def save_tweak_selection(
     try:
         db = await get_db(user_id)
         
-        # Save each selected tweak as a preference
-        for tweak in request.selected_tweaks:
-            # Normalize tweak to preference key
-            fact_key = f"prefers:{tweak.lower().replace(' ', '_')}"
-            await db.update_preference_fact(
-                user_id=user_id,
-                fact_key=fact_key,
-                delta=0.3,  # Moderate positive signal
-                source_meal_id=suggestion_id,
-            )
+        # Save all selected tweaks as preferences in one transaction;
+        # tweaks are normalized to preference keys, 0.3 is a moderate positive signal
+        await db.update_preference_facts_bulk(user_id, [
+            (f"prefers:{tweak.lower().replace(' ', '_')}", 0.3, suggestion_id)
+            for tweak in request.selected_tweaks
+        ])
+        invalidate_context(user_id)
         
         return ApiResponse.success({
             "saved": len(request.selected_tweaks),
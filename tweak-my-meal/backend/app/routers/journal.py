@@ -1,17 +1,45 @@
 """
 Journal API Routes - Weekly check-ins and wisdom
 """
+import asyncio
+import secrets
 from datetime import datetime, timezone, timedelta
+from os.path import basename
 from typing import Optional
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
 
 from ..schemas.api import ApiResponse
 from ..db import get_db
 from ..services.openai_client import openai_client
+from ..services.tip_cache import tip_cache
+from ..config import settings
+from .conditional import make_etag, not_modified
 
 router = APIRouter(prefix="/api/journal", tags=["journal"])
 
+# Max concurrent per-meal tip requests to the model
+TIP_CONCURRENCY = 8
+
+# Reflection context limits for the weekly wisdom prompt (characters)
+REFLECTION_MAX_CHARS = 200
+REFLECTIONS_CHAR_BUDGET = 2000
+
+_TIP_SYSTEM_MSG = {"role": "system", "content": "You are a nutrition expert. Give practical, science-backed advice."}
+_TIP_PROMPT = """For the meal "{title}", provide:
+1. "better_bite": A specific, actionable tip to make this meal healthier (1-2 sentences)
+2. "the_science": A brief explanation of why this tip works nutritionally (1-2 sentences)
+
+Respond as JSON with "better_bite" and "the_science" keys. No emojis."""
+
+_WISDOM_SYSTEM_MSG = {"role": "system", "content": "You are a supportive nutrition coach. Give personalized, actionable advice."}
+_WISDOM_INSTRUCTIONS = """
+Generate a response as JSON with:
+1. "summary": A warm, encouraging 1-2 sentence summary of their week (acknowledge their reflections if any)
+2. "tips": Array of exactly 4 actionable tips for the coming week. Each tip should be specific and achievable.
+
+Keep tips concise (1-2 sentences each). Be encouraging but realistic. No emojis."""
+
 
 class AddReflectionRequest(BaseModel):
     user_id: str = "user_0001"
@@ -19,9 +47,12 @@ class AddReflectionRequest(BaseModel):
 
 
 @router.get("/weekly", response_model=ApiResponse)
-async def get_weekly_journal(user_id: str = "user_0001"):
+async def get_weekly_journal(request: Request, response: Response, user_id: str = "user_0001"):
     """
     Get weekly journal data including reflections, AI wisdom, and meal history.
+    Clients that send back the last ETag get an empty 304 (and no AI calls)
+    until a meal, outcome, reflection or the profile changes. Responses that
+    used fallback wisdom or tips carry no ETag, so the next visit retries.
     """
     try:
         db = await get_db(user_id)
@@ -32,21 +63,38 @@ async def get_weekly_journal(user_id: str = "user_0001"):
         start_of_week = today - timedelta(days=today.weekday())
         start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Get reflections for this week
-        reflections = await _get_week_reflections(db, user_id, start_of_week)
-        
-        # Get meals for this week (with full details)
-        meals = await _get_week_meals(db, user_id, start_of_week)
+        etag = make_etag(start_of_week, await db.get_journal_fingerprint(user_id, start_of_week))
+        if cached := not_modified(request, etag):
+            return cached
         
-        # Get user profile for context
-        profile = await db.get_profile(user_id)
+        # Get this week's reflections, this week's meals (with full details)
+        # and the user profile for context
+        reflections, meals, profile = await asyncio.gather(
+            _get_week_reflections(db, user_id, start_of_week),
+            _get_week_meals(db, user_id, start_of_week),
+            db.get_profile(user_id),
+        )
         
-        # Generate weekly wisdom
-        wisdom = await _generate_weekly_wisdom(profile, meals, reflections, start_of_week)
-        
-        # Generate better bite tips for each meal
-        meals_with_tips = await _enrich_meals_with_tips(meals)
+        # Generate weekly wisdom and better bite tips for each meal concurrently;
+        # a failure in one still returns the other
+        wisdom, tips_result = await asyncio.gather(
+            _generate_weekly_wisdom(profile, meals, reflections, start_of_week),
+            _enrich_meals_with_tips(db, meals),
+            return_exceptions=True,
+        )
+        degraded = False
+        if isinstance(wisdom, BaseException):
+            wisdom = _fallback_wisdom()
+            degraded = True
+        if isinstance(tips_result, BaseException):
+            meals_with_tips = meals
+            degraded = True
+        else:
+            meals_with_tips, tips_complete = tips_result
+            degraded = degraded or not tips_complete
         
+        if not degraded:
+            response.headers["ETag"] = etag
         return ApiResponse.success({
             "week_of": start_of_week.strftime("%b %d").upper(),
             "reflections": reflections,
@@ -69,7 +117,7 @@ async def add_reflection(request: AddReflectionRequest):
         db = await get_db(request.user_id)
         await db.ensure_user(request.user_id)
         
-        # Save reflection using session state
+        # Save reflection
         reflection_id = await _save_reflection_as_memory(db, request.user_id, request.text)
         
         return ApiResponse.success({
@@ -107,102 +155,90 @@ async def get_reflections(user_id: str = "user_0001", limit: int = 10):
 
 async def _get_week_reflections(db, user_id: str, start_of_week: datetime) -> list[dict]:
     """Get reflections for the current week."""
-    # Get from session state where we store reflections
-    state = await db.get_session_state(f"reflections_{user_id}")
-    if not state:
-        return []
-    
-    reflections = state.get("items", [])
-    
-    # Filter to this week
-    week_reflections = []
-    for r in reflections:
-        try:
-            created = datetime.fromisoformat(r["created_at"].replace("Z", "+00:00"))
-            if created >= start_of_week:
-                week_reflections.append(r)
-        except:
-            pass
-    
-    return week_reflections
+    return await db.get_reflections_since(user_id, start_of_week)
 
 
 async def _get_week_meals(db, user_id: str, start_of_week: datetime) -> list[dict]:
     """Get meals for the current week."""
-    all_meals = await db.get_history(user_id, limit=100, offset=0)
+    week_meals = await db.get_meals_since(user_id, start_of_week, limit=100)
     
-    week_meals = []
-    for meal in all_meals:
-        try:
-            created = datetime.fromisoformat(meal["created_at"].replace("Z", "+00:00"))
-            if created >= start_of_week:
-                # Convert local image path to URL
-                if meal.get("image_path"):
-                    from pathlib import Path
-                    filename = Path(meal["image_path"]).name
-                    meal["image_url"] = f"http://127.0.0.1:8080/images/{user_id}/{filename}"
-                week_meals.append(meal)
-        except:
-            pass
+    # Convert local image paths to URLs
+    url_prefix = settings.image_url_prefix(user_id)
+    for meal in week_meals:
+        if meal.get("image_path"):
+            meal["image_url"] = url_prefix + basename(meal["image_path"])
     
     return week_meals
 
 
 async def _save_reflection_as_memory(db, user_id: str, text: str) -> str:
-    """Save reflection to session state."""
-    import uuid
+    """Save reflection (the database keeps the last 50)."""
+    reflection_id = secrets.token_hex(12)
+    await db.add_reflection(reflection_id, user_id, text)
+    return reflection_id
+
+
+async def _enrich_meals_with_tips(db, meals: list[dict]) -> tuple[list[dict], bool]:
+    """
+    Add better bite tips and science to each meal.
+    Meals keep tips stored on a previous visit; the rest come from the tip cache
+    where possible or are generated concurrently, then get stored on the meal.
+    Returns (meals, complete); complete is False when any meal got a fallback tip.
+    """
+    pending = [meal for meal in meals if not (meal.get("better_bite") and meal.get("the_science"))]
+    if not pending:
+        return meals, True
     
-    state = await db.get_session_state(f"reflections_{user_id}")
-    items = state.get("items", []) if state else []
+    titles = [meal.get("title", "Meal") for meal in pending]
+    cached, embeddings = await tip_cache.lookup(titles)
+    missing = [title for title in dict.fromkeys(titles) if title not in cached]
     
-    reflection_id = str(uuid.uuid4())
-    items.append({
-        "id": reflection_id,
-        "text": text,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-    })
+    semaphore = asyncio.Semaphore(TIP_CONCURRENCY)
     
-    # Keep last 50 reflections
-    items = items[-50:]
+    async def generate_tip(title: str) -> dict:
+        messages = [
+            _TIP_SYSTEM_MSG,
+            {"role": "user", "content": _TIP_PROMPT.format(title=title)},
+        ]
+        
+        async with semaphore:
+            return await openai_client.chat_json(messages=messages, temperature=0.7)
     
-    await db.upsert_session_state(f"reflections_{user_id}", user_id, {
-        "items": items,
-    })
+    results = await asyncio.gather(
+        *(generate_tip(title) for title in missing),
+        return_exceptions=True,
+    )
     
-    return reflection_id
-
-
-async def _enrich_meals_with_tips(meals: list[dict]) -> list[dict]:
-    """Add better bite tips and science to each meal."""
-    enriched = []
+    generated = dict(zip(missing, results))
+    await tip_cache.store_many([
+        (title, {"better_bite": result["better_bite"], "the_science": result["the_science"]}, embeddings.get(title))
+        for title, result in generated.items()
+        if isinstance(result, dict) and result.get("better_bite") and result.get("the_science")
+    ])
     
-    for meal in meals:
-        title = meal.get("title", "Meal")
-        
-        # Generate better bite tip
-        try:
-            tip_prompt = f"""For the meal "{title}", provide:
-1. "better_bite": A specific, actionable tip to make this meal healthier (1-2 sentences)
-2. "the_science": A brief explanation of why this tip works nutritionally (1-2 sentences)
-
-Respond as JSON with "better_bite" and "the_science" keys. No emojis."""
-            
-            messages = [
-                {"role": "system", "content": "You are a nutrition expert. Give practical, science-backed advice."},
-                {"role": "user", "content": tip_prompt},
-            ]
-            
-            result = await openai_client.chat_json(messages=messages, temperature=0.7)
-            
-            meal["better_bite"] = result.get("better_bite", "Add more vegetables to boost fiber and nutrients.")
-            meal["the_science"] = result.get("the_science", "Fiber helps with digestion and keeps you feeling full longer.")
-        except:
+    to_store = []
+    complete = True
+    for meal, title in zip(pending, titles):
+        result = cached.get(title) or generated.get(title)
+        if result is None or isinstance(result, BaseException):
             meal["better_bite"] = "Add a palm-sized serving of protein to feel fuller and lighter longer."
             meal["the_science"] = "Protein slows gastric emptying and stabilizes blood sugar, reducing hunger swings."
-        
-        enriched.append(meal)
+            complete = False
+        else:
+            meal["better_bite"] = result.get("better_bite", "Add more vegetables to boost fiber and nutrients.")
+            meal["the_science"] = result.get("the_science", "Fiber helps with digestion and keeps you feeling full longer.")
+            if result.get("better_bite") and result.get("the_science"):
+                to_store.append((meal["meal_id"], meal["better_bite"], meal["the_science"]))
+            else:
+                complete = False
+    
+    # Fallback tips are not stored, so those meals are retried next time
+    try:
+        await db.update_meal_tips(to_store)
+    except Exception as e:
+        print(f"Warning: Failed to store meal tips: {e}")
     
-    return enriched
+    return meals, complete
 
 
 async def _generate_weekly_wisdom(
@@ -211,59 +247,68 @@ async def _generate_weekly_wisdom(
     reflections: list[dict],
     start_of_week: datetime,
 ) -> dict:
-    """Generate AI weekly wisdom based on user's week."""
-    try:
-        # Build context
-        context_parts = ["Generate weekly wisdom for a nutrition app user."]
-        
-        if profile:
-            if profile.get("goals"):
-                context_parts.append(f"User goals: {', '.join(profile['goals'])}")
-            if profile.get("diet_style"):
-                context_parts.append(f"Diet: {profile['diet_style']}")
-        
-        if meals:
-            meal_titles = [m.get("title", "meal") for m in meals[:10]]
-            context_parts.append(f"Meals this week: {', '.join(meal_titles)}")
-        else:
-            context_parts.append("No meals logged this week yet.")
-        
-        if reflections:
-            reflection_texts = [r.get("text", "") for r in reflections[:5]]
+    """Generate AI weekly wisdom based on user's week (raises if the AI call fails)."""
+    # Build context
+    context_parts = ["Generate weekly wisdom for a nutrition app user."]
+    
+    if profile:
+        if profile.get("goals"):
+            context_parts.append(f"User goals: {', '.join(profile['goals'])}")
+        if profile.get("diet_style"):
+            context_parts.append(f"Diet: {profile['diet_style']}")
+    
+    if meals:
+        meal_titles = [m.get("title", "meal") for m in meals[:10]]
+        context_parts.append(f"Meals this week: {', '.join(meal_titles)}")
+    else:
+        context_parts.append("No meals logged this week yet.")
+    
+    if reflections:
+        reflection_texts = _budget_reflections(reflections[:5])
+        if reflection_texts:
             context_parts.append(f"User reflections: {'; '.join(reflection_texts)}")
-        
-        context_parts.append("""
-Generate a response as JSON with:
-1. "summary": A warm, encouraging 1-2 sentence summary of their week (acknowledge their reflections if any)
-2. "tips": Array of exactly 4 actionable tips for the coming week. Each tip should be specific and achievable.
+    
+    context_parts.append(_WISDOM_INSTRUCTIONS)
+    
+    messages = [
+        _WISDOM_SYSTEM_MSG,
+        {"role": "user", "content": "\n".join(context_parts)},
+    ]
+    
+    result = await openai_client.chat_json(messages=messages, temperature=0.7)
+    
+    return {
+        "summary": result.get("summary", "Keep up the great work on your nutrition journey!"),
+        "tips": result.get("tips", [
+            "Add a serving of vegetables to one meal today",
+            "Drink a glass of water before each meal",
+            "Try a new healthy recipe this week",
+            "Take a moment to enjoy your food mindfully",
+        ]),
+    }
 
-Keep tips concise (1-2 sentences each). Be encouraging but realistic. No emojis.""")
-        
-        messages = [
-            {"role": "system", "content": "You are a supportive nutrition coach. Give personalized, actionable advice."},
-            {"role": "user", "content": "\n".join(context_parts)},
-        ]
-        
-        result = await openai_client.chat_json(messages=messages, temperature=0.7)
-        
-        return {
-            "summary": result.get("summary", "Keep up the great work on your nutrition journey!"),
-            "tips": result.get("tips", [
-                "Add a serving of vegetables to one meal today",
-                "Drink a glass of water before each meal",
-                "Try a new healthy recipe this week",
-                "Take a moment to enjoy your food mindfully",
-            ]),
-        }
-        
-    except Exception as e:
-        # Fallback wisdom
-        return {
-            "summary": "Every meal is a chance to nourish yourself. Keep making mindful choices!",
-            "tips": [
-                "Add a handful of leafy greens like spinach or kale to one meal each day",
-                "Try drinking a full glass of water 10 minutes before your next meal",
-                "Experiment with one new healthy ingredient this week",
-                "Set a gentle reminder to pause and take 3 breaths before eating",
-            ],
-        }
+
+def _budget_reflections(reflections: list[dict]) -> list[str]:
+    """Reflection texts, each truncated, stopping once the total character budget is used."""
+    budget = REFLECTIONS_CHAR_BUDGET
+    texts = []
+    for r in reflections:
+        text = r.get("text", "")[:REFLECTION_MAX_CHARS]
+        if len(text) > budget:
+            break
+        texts.append(text)
+        budget -= len(text)
+    return texts
+
+
+def _fallback_wisdom() -> dict:
+    """Weekly wisdom used when the AI call fails."""
+    return {
+        "summary": "Every meal is a chance to nourish yourself. Keep making mindful choices!",
+        "tips": [
+            "Add a handful of leafy greens like spinach or kale to one meal each day",
+            "Try drinking a full glass of water 10 minutes before your next meal",
+            "Experiment with one new healthy ingredient this week",
+            "Set a gentle reminder to pause and take 3 breaths before eating",
+        ],
+    }
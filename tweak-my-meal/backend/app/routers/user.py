@@ -1,14 +1,16 @@
 """
 User Profile API Routes
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 
 from ..schemas.api import (
     ApiResponse, CreateProfileRequest, CreateProfileResponse,
     UserSummaryResponse, PreferenceFactSummary
 )
-from ..db import get_db
+from ..db import get_db, summarize_profile
 from ..config import settings
+from ..services.context_cache import invalidate_context
+from .conditional import make_etag, not_modified
 
 router = APIRouter(prefix="/api/user", tags=["user"])
 
@@ -33,10 +35,11 @@ async def create_or_update_profile(request: CreateProfileRequest):
         # Upsert profile
         profile_data = request.profile.model_dump(exclude_none=True)
         version = await db.upsert_profile(user_id, profile_data)
+        invalidate_context(user_id)
         
-        # Generate summary
+        # Summary is computed on write
         profile = await db.get_profile(user_id)
-        summary = _generate_profile_summary(profile)
+        summary = _profile_summary(profile)
         
         return ApiResponse.success(CreateProfileResponse(
             user_id=user_id,
@@ -50,9 +53,10 @@ async def create_or_update_profile(request: CreateProfileRequest):
 
 
 @router.get("/summary", response_model=ApiResponse)
-async def get_user_summary(user_id: str = "user_0001"):
+async def get_user_summary(request: Request, response: Response, user_id: str = "user_0001"):
     """
     Get user summary including profile and top preferences.
+    Supports If-None-Match; unchanged summaries return an empty 304.
     """
     try:
         db = await get_db(user_id)
@@ -64,7 +68,7 @@ async def get_user_summary(user_id: str = "user_0001"):
         
         # Get profile
         profile = await db.get_profile(user_id)
-        summary = _generate_profile_summary(profile)
+        summary = _profile_summary(profile)
         
         # Get top preferences
         pref_facts = await db.get_top_preference_facts(user_id, limit=10)
@@ -73,31 +77,24 @@ async def get_user_summary(user_id: str = "user_0001"):
             for f in pref_facts
         ]
         
-        return ApiResponse.success(UserSummaryResponse(
+        data = UserSummaryResponse(
             user_id=user_id,
             profile_summary=summary,
             top_preferences=top_prefs,
-        ))
+        )
+        etag = make_etag(data.model_dump())
+        if cached := not_modified(request, etag):
+            return cached
+        response.headers["ETag"] = etag
+        
+        return ApiResponse.success(data)
         
     except Exception as e:
         return ApiResponse.failure("INTERNAL_ERROR", str(e))
 
 
-def _generate_profile_summary(profile: dict | None) -> str:
-    """Generate human-readable profile summary"""
-    if not profile:
-        return "New user - complete onboarding to personalize"
-    
-    parts = []
-    if profile.get("display_name"):
-        parts.append(profile["display_name"])
-    if profile.get("diet_style"):
-        parts.append(profile["diet_style"])
-    if profile.get("cooking_skill"):
-        parts.append(f"{profile['cooking_skill']} cook")
-    if profile.get("goals"):
-        parts.append(f"Goals: {', '.join(profile['goals'][:2])}")
-    if profile.get("allergies"):
-        parts.append(f"Allergies: {', '.join(profile['allergies'])}")
-    
-    return " | ".join(parts) if parts else "Basic profile saved"
+def _profile_summary(profile: dict | None) -> str:
+    """Stored profile summary, computed for profiles saved before it was stored"""
+    if profile and profile.get("profile_summary"):
+        return profile["profile_summary"]
+    return summarize_profile(profile)
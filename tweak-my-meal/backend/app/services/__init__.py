@@ -1,3 +1,4 @@
 from .openai_client import OpenAIClient, openai_client
+from .http_client import http_client, download_to_file
 from .vector_store import VectorStore
 from .orchestrator import Orchestrator
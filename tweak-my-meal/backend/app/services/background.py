@@ -0,0 +1,38 @@
+"""
+Background task registry - fire-and-forget work that stays referenced until done
+and is drained on shutdown
+"""
+import asyncio
+from typing import Any, Coroutine
+
+
+# Running background tasks; the event loop only keeps weak references to tasks
+_tasks: set[asyncio.Task] = set()
+
+# How long shutdown waits for in-flight work before cancelling it
+DRAIN_TIMEOUT_SECONDS = 10
+
+
+def spawn(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """Start coro as a background task, keeping it alive and reporting a crash"""
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+def _finished(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Warning: Background task failed: {task.exception()!r}")
+
+
+async def drain(timeout: float = DRAIN_TIMEOUT_SECONDS):
+    """Wait for running background tasks, cancelling whatever is left after timeout"""
+    if not _tasks:
+        return
+    pending = list(_tasks)
+    _, still_running = await asyncio.wait(pending, timeout=timeout)
+    for task in still_running:
+        task.cancel()
+    await asyncio.gather(*still_running, return_exceptions=True)
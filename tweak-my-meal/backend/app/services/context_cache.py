@@ -0,0 +1,60 @@
+"""
+Short-lived cache of user context bundles
+A chat turn, a modification and the selection that follows it rebuild the
+same profile/preferences/memories context within seconds; this keeps the
+result for a minute, and writers invalidate the user's entries on change
+"""
+import hashlib
+from typing import Awaitable, Callable, Optional
+
+from cachetools import TTLCache
+
+
+CONTEXT_TTL_SECONDS = 60
+
+# (user_id, query hash) -> context bundle
+_contexts: TTLCache = TTLCache(maxsize=1024, ttl=CONTEXT_TTL_SECONDS)
+
+# user_id -> profile; shared by every query, so a new query text still skips the profile read
+_profiles: TTLCache = TTLCache(maxsize=1024, ttl=CONTEXT_TTL_SECONDS)
+
+
+def _key(user_id: str, query_text: Optional[str]) -> tuple[str, str]:
+    digest = hashlib.blake2b((query_text or "").encode("utf-8"), digest_size=8).hexdigest()
+    return user_id, digest
+
+
+async def get_context(
+    user_id: str,
+    query_text: Optional[str],
+    builder: Callable[[Optional[str]], Awaitable[dict]],
+) -> dict:
+    """Cached context for (user, query), built with builder(query_text) on a miss"""
+    key = _key(user_id, query_text)
+    context = _contexts.get(key)
+    if context is None:
+        context = await builder(query_text)
+        _contexts[key] = context
+    # Callers add per-turn keys (e.g. modification_request), so hand out a copy
+    return dict(context)
+
+
+async def get_profile(
+    user_id: str,
+    loader: Callable[[str], Awaitable[Optional[dict]]],
+) -> Optional[dict]:
+    """Cached profile for a user, loaded with loader(user_id) on a miss (missing profiles are not cached)"""
+    profile = _profiles.get(user_id)
+    if profile is None:
+        profile = await loader(user_id)
+        if profile is None:
+            return None
+        _profiles[user_id] = profile
+    return dict(profile)
+
+
+def invalidate_context(user_id: str):
+    """Drop every cached context and profile for a user after their profile, facts, meals or memories change"""
+    _profiles.pop(user_id, None)
+    for key in [k for k in list(_contexts.keys()) if k[0] == user_id]:
+        _contexts.pop(key, None)
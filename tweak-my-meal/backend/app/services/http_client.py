@@ -0,0 +1,45 @@
+"""
+Shared HTTP client with connection pooling for outbound downloads
+"""
+import os
+from pathlib import Path
+
+import aiofiles
+import httpx
+
+
+# Singleton instance - closed on application shutdown (see main.lifespan).
+# HTTP/2 lets parallel image downloads from the same host share one connection.
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(
+        max_keepalive_connections=20,
+        max_connections=100,
+        keepalive_expiry=30.0,
+    ),
+)
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def download_to_file(url: str, path: Path) -> bool:
+    """
+    Stream url to path without buffering the whole body or blocking the loop.
+    
+    Writes to a temporary ".part" file and renames it into place, so readers
+    never see a half-written file. Returns False on a non-200 response.
+    """
+    tmp_path = path.with_name(path.name + ".part")
+    async with http_client.stream("GET", url) as response:
+        if response.status_code != 200:
+            return False
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    os.replace(tmp_path, path)
+    return True
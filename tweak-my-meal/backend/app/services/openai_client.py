@@ -1,22 +1,47 @@
 """
 OpenAI Client Wrapper with Vision and Embedding support
 """
-import json
+import asyncio
 import base64
+import ipaddress
 import re
 from typing import Optional, Any
 from pathlib import Path
+from urllib.parse import urlparse
+
+import aiofiles
+import aiofiles.os
+import orjson
+from cachetools import LRUCache
 from openai import AsyncOpenAI
 
 from ..config import settings
 
 
+def _is_internet_host(host: Optional[str]) -> bool:
+    """Whether OpenAI could plausibly fetch from host (not loopback, LAN, link-local or mDNS)"""
+    if not host or host == "localhost" or host.endswith(".local"):
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return True  # a DNS name
+    return not (address.is_private or address.is_link_local or address.is_loopback)
+
+# Base64 image encodings keyed by (path, mtime_ns, size), so edits invalidate them
+_encoded_images: LRUCache = LRUCache(maxsize=32)
+
+
 class OpenAIClient:
     def __init__(self):
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.text_model = settings.OPENAI_TEXT_MODEL
         self.vision_model = settings.OPENAI_VISION_MODEL
         self.embedding_model = settings.OPENAI_EMBEDDING_MODEL
+        # Opt-in, and OpenAI can only fetch images from a base URL reachable from the internet
+        base_url = settings.PUBLIC_BASE_URL
+        use_urls = settings.VISION_IMAGES_BY_URL and base_url and _is_internet_host(urlparse(base_url).hostname)
+        self.public_base_url = base_url if use_urls else ""
 
     async def chat(
         self,
@@ -54,9 +79,8 @@ class OpenAIClient:
             max_tokens=max_tokens,
             response_format={"type": "json_object"},
         )
-        # Clean potential markdown wrapping
-        content = self._clean_json(content)
-        return json.loads(content)
+        # JSON mode guarantees a bare JSON object, so no markdown cleanup is needed
+        return orjson.loads(content)
 
     async def vision(
         self,
@@ -66,21 +90,26 @@ class OpenAIClient:
         temperature: float = 0.5,
         max_tokens: int = 2048,
     ) -> str:
-        """Vision request with one or more images"""
+        """
+        Vision request with one or more images.
+        Images are sent by public URL when the server is reachable
+        (see settings.VISION_IMAGES_BY_URL), otherwise inlined as base64.
+        """
         # Build content with images
         content: list[dict] = []
         
         # Add images first
-        for img_path in image_paths:
-            base64_image = self._encode_image(img_path)
-            if base64_image:
-                content.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/jpeg;base64,{base64_image}",
-                        "detail": "high"
-                    }
-                })
+        image_urls = await asyncio.gather(*(self._image_path_url(p) for p in image_paths))
+        for url in image_urls:
+            if not url:
+                continue
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": url,
+                    "detail": "high"
+                }
+            })
         
         # Add text prompt
         content.append({"type": "text", "text": prompt})
@@ -117,7 +146,7 @@ class OpenAIClient:
             max_tokens=max_tokens,
         )
         content = self._clean_json(content)
-        return json.loads(content)
+        return orjson.loads(content)
 
     async def generate_image(
         self,
@@ -148,18 +177,49 @@ class OpenAIClient:
         return [item.embedding for item in response.data]
 
     async def embed_single(self, text: str) -> list[float]:
-        """Generate embedding for a single text"""
+        """
+        Generate embedding for a single text.
+        One request per call - when embedding several texts, collect them and
+        call embed() once instead.
+        """
         embeddings = await self.embed([text])
         return embeddings[0]
 
-    def _encode_image(self, image_path: str | Path) -> Optional[str]:
+    async def _public_image_url(self, image_path: str | Path) -> Optional[str]:
+        """Public /images URL for a stored user image, or None if it must be inlined"""
+        if not self.public_base_url:
+            return None
+        path = Path(image_path)
+        images_dir = path.parent
+        user_id = images_dir.parent.name
+        if images_dir != settings.user_images_dir(user_id) or not await aiofiles.os.path.exists(path):
+            return None
+        return settings.image_url_prefix(user_id) + path.name
+
+    async def _image_path_url(self, image_path: str | Path) -> Optional[str]:
+        """Public URL for a local image if available, else a base64 data URL"""
+        url = await self._public_image_url(image_path)
+        if url:
+            return url
+        base64_image = await self._encode_image(image_path)
+        return f"data:image/jpeg;base64,{base64_image}" if base64_image else None
+
+    async def _encode_image(self, image_path: str | Path) -> Optional[str]:
         """Encode image to base64"""
         path = Path(image_path)
-        if not path.exists():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
             return None
         
-        with open(path, "rb") as f:
-            return base64.standard_b64encode(f.read()).decode("utf-8")
+        # Images are often sent to several agents in one pipeline, so reuse the encoding
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        encoded = _encoded_images.get(key)
+        if encoded is None:
+            async with aiofiles.open(path, "rb") as f:
+                encoded = base64.b64encode(await f.read()).decode("ascii")
+            _encoded_images[key] = encoded
+        return encoded
 
     def _clean_json(self, content: str) -> str:
         """Remove markdown code blocks if present"""
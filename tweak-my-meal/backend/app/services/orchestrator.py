@@ -1,13 +1,19 @@
 """
 Orchestrator - Deterministic coordinator for agent pipeline
 """
+import hashlib
 import json
+import os
 import uuid
 import asyncio
-import httpx
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional, Union
 import shutil
+from datetime import datetime, timedelta, timezone
+
+import aiofiles
+import orjson
 
 from ..config import settings
 from ..db import get_db
@@ -15,13 +21,73 @@ from ..schemas.api import (
     FollowUpResponse, SuggestionsResponse, RecipeResponse,
     SourceInfo, Suggestion as ApiSuggestion
 )
-from ..schemas.agents import VisionResult, NormalizedInput, Suggestion, RecipeResult
+from ..schemas.agents import VisionResult, NormalizedInput, Suggestion, RecipeResult, SuggestionsResult
 from ..agents import (
     VisionAgent, MealUnderstandingAgent, SuggestionAgent,
     RecipeAgent, MemoryUpdateAgent
 )
-from .vector_store import get_vector_store
+from .vector_store import VectorStore, get_vector_store
+from .suggestion_cache import get_suggestion_cache, suggestion_cache_key
+from .context_cache import get_context, get_profile, invalidate_context
 from .openai_client import openai_client
+from .http_client import download_to_file
+from .background import spawn
+from .singleflight import singleflight
+from .tip_cache import normalize_title
+
+
+# Presentation styles (background, plating) cycled across suggestions for variety
+_PRESENTATION_STYLES = [
+    ("rustic wooden table, natural lighting, overhead shot", "earthenware bowl"),
+    ("marble countertop, soft studio lighting, 45-degree angle", "modern white plate"),
+    ("dark slate background, dramatic side lighting, close-up", "cast iron skillet"),
+    ("bright kitchen setting, window light, styled with herbs", "ceramic plate with garnish"),
+    ("minimalist white background, professional food styling", "bowl with chopsticks"),
+]
+
+_IMAGE_PROMPT = (
+    "Professional food photography of {title}{ingredients}. "
+    "Served in a {plating}. {background}. "
+    "Appetizing, realistic, restaurant-quality presentation. "
+    "Sharp focus on the food, vibrant colors, no text or labels or watermarks."
+)
+
+# A suggestion with the same title as one imaged within this window reuses that image
+IMAGE_REUSE_WINDOW = timedelta(hours=24)
+
+
+def _new_ids(count: int) -> list[str]:
+    """`count` random (version 4) UUID strings from a single os.urandom read"""
+    raw = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
+def _to_api_suggestions(suggestions: list[Suggestion]) -> list[ApiSuggestion]:
+    """
+    Response suggestions without images (those load async). Fields come from
+    already-validated suggestions, so construct without re-validating
+    """
+    return [
+        ApiSuggestion.model_construct(
+            suggestion_id=s.suggestion_id,
+            title=s.title,
+            summary=s.summary,
+            health_rationale=s.health_rationale,
+            tags=s.tags,
+            estimated_time_minutes=s.estimated_time_minutes,
+            difficulty=s.difficulty,
+            image_url=None,
+        )
+        for s in suggestions
+    ]
+
+
+@lru_cache(maxsize=None)
+def _user_images_dir(user_id: str) -> Path:
+    """User images directory, created on first use"""
+    images_dir = settings.user_images_dir(user_id)
+    images_dir.mkdir(parents=True, exist_ok=True)
+    return images_dir
 
 
 class Orchestrator:
@@ -47,168 +113,139 @@ class Orchestrator:
     async def _get_db(self):
         return await get_db(self.user_id)
 
-    def _get_vector_store(self):
+    @cached_property
+    def vector_store(self) -> VectorStore:
         return get_vector_store(self.user_id)
 
+    async def _cached_profile(self) -> Optional[dict]:
+        db = await self._get_db()
+        return await get_profile(self.user_id, db.get_profile)
+
     async def build_user_context(self, query_text: Optional[str] = None) -> dict:
-        """Build context bundle for agents"""
+        """Build context bundle for agents, reusing one built moments ago for the same query"""
+        return await get_context(self.user_id, query_text, self._build_user_context)
+
+    async def _build_user_context(self, query_text: Optional[str]) -> dict:
         db = await self._get_db()
         
-        # Get profile
-        profile = await db.get_profile(self.user_id) or {}
-        
-        # Get top preference facts
-        preference_facts = await db.get_top_preference_facts(
-            self.user_id, 
-            limit=settings.TOP_K_PREFERENCE_FACTS
-        )
-        
-        # Get recent meals
-        recent_meals = await db.get_recent_meals(
-            self.user_id,
-            limit=settings.RECENT_MEALS_COUNT
+        # Profile, top preference facts, recent meals and relevant memories are
+        # independent reads, so fetch them concurrently
+        profile, preference_facts, recent_meals, memories = await asyncio.gather(
+            self._cached_profile(),
+            db.get_top_preference_facts(self.user_id, limit=settings.TOP_K_PREFERENCE_FACTS),
+            db.get_recent_meals(self.user_id, limit=settings.RECENT_MEALS_COUNT),
+            self._search_memories(query_text),
         )
         
-        # Retrieve relevant memories via vector search
-        memories = []
-        if query_text:
-            try:
-                vs = self._get_vector_store()
-                memories = await vs.search(query_text, top_k=settings.TOP_K_MEMORIES)
-            except Exception:
-                pass  # Vector store may not have data yet
-        
         return {
-            "profile": profile,
+            "profile": profile or {},
             "preference_facts": preference_facts,
             "recent_meals": recent_meals,
             "memories": memories,
         }
 
+    async def _search_memories(self, query_text: Optional[str]) -> list[dict]:
+        """Vector search over memories; empty when there is no query or nothing to search"""
+        if not query_text:
+            return []
+        try:
+            return await self.vector_store.search(query_text, top_k=settings.TOP_K_MEMORIES)
+        except Exception:
+            return []  # Vector store may not have data yet
+
+    async def _suggest(self, normalized: NormalizedInput, user_context: dict) -> SuggestionsResult:
+        """Suggestion Agent call, answered from the suggestion cache for near-duplicate requests"""
+        cache = get_suggestion_cache(self.user_id)
+        scope, text = suggestion_cache_key(normalized, user_context)
+        cached, embedding = await cache.lookup(scope, text)
+        if cached:
+            return SuggestionsResult.model_validate(cached)
+        
+        suggestions_result = await self.suggestion_agent.suggest(
+            normalized_input=normalized,
+            user_context=user_context,
+        )
+        if suggestions_result.suggestions:
+            cache.store(scope, text, embedding, suggestions_result.model_dump())
+        return suggestions_result
+
     async def save_uploaded_images(self, images: list[tuple[str, bytes]]) -> list[str]:
-        """Save uploaded images and return paths"""
-        images_dir = settings.user_images_dir(self.user_id)
-        images_dir.mkdir(parents=True, exist_ok=True)
+        """Save uploaded images concurrently and return paths"""
+        images_dir = _user_images_dir(self.user_id)
         
-        saved_paths = []
-        for filename, content in images:
+        async def save_one(filename: str, content: bytes, file_id: str) -> str:
             # Generate unique filename
             ext = Path(filename).suffix or ".jpg"
-            new_filename = f"{uuid.uuid4()}{ext}"
-            path = images_dir / new_filename
-            
-            with open(path, "wb") as f:
-                f.write(content)
-            
-            saved_paths.append(str(path))
-        
-        return saved_paths
+            path = images_dir / f"{file_id}{ext}"
+            async with aiofiles.open(path, "wb") as f:
+                await f.write(content)
+            return str(path)
+        
+        file_ids = _new_ids(len(images))
+        return list(await asyncio.gather(*(
+            save_one(name, content, file_id) for (name, content), file_id in zip(images, file_ids)
+        )))
 
     async def _generate_and_save_images(self, session_id: str, suggestions: list[Suggestion]):
         """Background task to generate images, download them, and update session state"""
         try:
-            # Generate and download images in parallel
-            suggestion_images = await self.generate_and_download_suggestion_images(suggestions)
-            
-            # Update session state with local image URLs
             db = await self._get_db()
-            state = await db.get_session_state(session_id)
-            if state:
-                state["suggestion_images"] = suggestion_images
-                await db.upsert_session_state(session_id, self.user_id, state)
+            jobs = [self._suggestion_image(s, i) for i, s in enumerate(suggestions)]
+            # Attach each image to the session state as soon as it is on disk,
+            # merging into suggestion_images without a read-modify-write
+            for next_done in asyncio.as_completed(jobs):
+                suggestion_id, local_url = await next_done
+                if local_url:
+                    await db.patch_session_state(session_id, {"suggestion_images": {suggestion_id: local_url}})
         except Exception as e:
             print(f"Background image generation failed: {e}")
 
-    async def generate_and_download_suggestion_images(self, suggestions: list[Suggestion]) -> dict[str, str]:
-        """Generate images for suggestions in parallel, download them, return dict of suggestion_id -> local_url"""
-        # Different presentation styles for variety
-        presentation_styles = [
-            ("rustic wooden table, natural lighting, overhead shot", "earthenware bowl"),
-            ("marble countertop, soft studio lighting, 45-degree angle", "modern white plate"),
-            ("dark slate background, dramatic side lighting, close-up", "cast iron skillet"),
-            ("bright kitchen setting, window light, styled with herbs", "ceramic plate with garnish"),
-            ("minimalist white background, professional food styling", "bowl with chopsticks"),
-        ]
-        
-        async def generate_and_download_one(suggestion: Suggestion, index: int) -> tuple[str, Optional[str]]:
-            try:
+    async def _suggestion_image(self, suggestion: Suggestion, index: int) -> tuple[str, Optional[str]]:
+        """
+        Local image URL for one suggestion: reuses an image generated for the
+        same title in the last IMAGE_REUSE_WINDOW, otherwise generates and downloads one
+        """
+        try:
+            db = await self._get_db()
+            title_key = normalize_title(suggestion.title)
+            local_path = await db.get_generated_image(
+                self.user_id, title_key, datetime.now(timezone.utc) - IMAGE_REUSE_WINDOW
+            )
+            if not local_path or not Path(local_path).exists():
+                local_path = None
                 # Get key ingredients for faithful representation
                 ingredients_desc = ""
                 if suggestion.key_ingredients:
                     ingredients_desc = f" featuring visible {', '.join(suggestion.key_ingredients[:4])}"
                 
                 # Vary the presentation style
-                style_idx = index % len(presentation_styles)
-                background, plating = presentation_styles[style_idx]
-                
-                prompt = (
-                    f"Professional food photography of {suggestion.title}{ingredients_desc}. "
-                    f"Served in a {plating}. {background}. "
-                    f"Appetizing, realistic, restaurant-quality presentation. "
-                    f"Sharp focus on the food, vibrant colors, no text or labels or watermarks."
+                background, plating = _PRESENTATION_STYLES[index % len(_PRESENTATION_STYLES)]
+                prompt = _IMAGE_PROMPT.format(
+                    title=suggestion.title, ingredients=ingredients_desc,
+                    plating=plating, background=background,
                 )
                 
                 dalle_url = await openai_client.generate_image(prompt, size="1024x1024", quality="standard")
-                
                 if dalle_url:
                     # Download and save locally
                     local_path = await self.download_and_save_image(dalle_url, suggestion.suggestion_id)
                     if local_path:
-                        # Return URL to our backend
-                        filename = Path(local_path).name
-                        local_url = f"http://127.0.0.1:8080/images/{self.user_id}/{filename}"
-                        return (suggestion.suggestion_id, local_url)
-                
-                return (suggestion.suggestion_id, None)
-            except Exception as e:
-                print(f"Failed to generate/download image for {suggestion.title}: {e}")
-                return (suggestion.suggestion_id, None)
-        
-        # Run all image generations in parallel with index for variety
-        tasks = [generate_and_download_one(s, i) for i, s in enumerate(suggestions)]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Build result dict, skipping failures
-        image_urls = {}
-        for result in results:
-            if isinstance(result, tuple) and result[1]:
-                image_urls[result[0]] = result[1]
-        
-        return image_urls
-
-    async def generate_suggestion_images(self, suggestions: list[Suggestion]) -> dict[str, str]:
-        """Generate images for suggestions in parallel, return dict of suggestion_id -> image_url"""
-        async def generate_one(suggestion: Suggestion) -> tuple[str, Optional[str]]:
-            prompt = f"A beautiful, appetizing food photography of {suggestion.title}. Professional lighting, top-down view, on a modern plate, restaurant quality presentation. No text or labels."
-            url = await openai_client.generate_image(prompt, size="1024x1024", quality="standard")
-            return (suggestion.suggestion_id, url)
-        
-        # Run all image generations in parallel
-        tasks = [generate_one(s) for s in suggestions]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Build result dict, skipping failures
-        image_urls = {}
-        for result in results:
-            if isinstance(result, tuple) and result[1]:
-                image_urls[result[0]] = result[1]
-        
-        return image_urls
+                        await db.save_generated_image(self.user_id, title_key, local_path)
+            
+            if local_path:
+                # Return URL to our backend
+                return (suggestion.suggestion_id, settings.image_url_prefix(self.user_id) + Path(local_path).name)
+            return (suggestion.suggestion_id, None)
+        except Exception as e:
+            print(f"Failed to generate/download image for {suggestion.title}: {e}")
+            return (suggestion.suggestion_id, None)
 
     async def download_and_save_image(self, image_url: str, meal_id: str) -> Optional[str]:
         """Download image from URL and save locally"""
         try:
-            images_dir = settings.user_images_dir(self.user_id)
-            images_dir.mkdir(parents=True, exist_ok=True)
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(image_url, timeout=30.0)
-                if response.status_code == 200:
-                    filename = f"{meal_id}.jpg"
-                    path = images_dir / filename
-                    with open(path, "wb") as f:
-                        f.write(response.content)
-                    return str(path)
+            path = _user_images_dir(self.user_id) / f"{meal_id}.jpg"
+            if await download_to_file(image_url, path):
+                return str(path)
         except Exception as e:
             print(f"Failed to download image: {e}")
         return None
@@ -224,8 +261,26 @@ class Orchestrator:
         """
         Process a chat turn through the agent pipeline.
         
-        Returns either follow-up questions or suggestions.
+        Returns either follow-up questions or suggestions. A retry of a turn
+        that is still in flight (same session and content) shares its result
+        instead of running the agents, and paying for images, twice.
         """
+        turn_hash = hashlib.blake2b(
+            json.dumps([text, image_paths or [], mode_hint, client_context], sort_keys=True).encode("utf-8"),
+            digest_size=8,
+        ).hexdigest()
+        return await singleflight(
+            f"chat-turn:{self.user_id}:{session_id}:{turn_hash}",
+            lambda: self._process_chat_turn(session_id, text, image_paths, client_context),
+        )
+
+    async def _process_chat_turn(
+        self,
+        session_id: str,
+        text: Optional[str],
+        image_paths: Optional[list[str]],
+        client_context: Optional[dict],
+    ) -> Union[FollowUpResponse, SuggestionsResponse]:
         db = await self._get_db()
         
         # Check for existing session state (pending follow-ups)
@@ -300,10 +355,7 @@ class Orchestrator:
             normalized.max_time_minutes = client_context["max_time_minutes"]
         
         # Step 3: Suggestion Agent
-        suggestions_result = await self.suggestion_agent.suggest(
-            normalized_input=normalized,
-            user_context=user_context,
-        )
+        suggestions_result = await self._suggest(normalized, user_context)
         
         # If suggestions need follow-up
         if not suggestions_result.suggestions and suggestions_result.follow_up_questions:
@@ -326,7 +378,7 @@ class Orchestrator:
         })
         
         # Start image generation in background (don't wait)
-        asyncio.create_task(self._generate_and_save_images(
+        spawn(self._generate_and_save_images(
             session_id, suggestions_result.suggestions
         ))
         
@@ -337,19 +389,7 @@ class Orchestrator:
                 input_kind=normalized.input_kind,
                 vision_result=vision_result,
             ),
-            suggestions=[
-                ApiSuggestion(
-                    suggestion_id=s.suggestion_id,
-                    title=s.title,
-                    summary=s.summary,
-                    health_rationale=s.health_rationale,
-                    tags=s.tags,
-                    estimated_time_minutes=s.estimated_time_minutes,
-                    difficulty=s.difficulty,
-                    image_url=None,  # Images load async
-                )
-                for s in suggestions_result.suggestions
-            ],
+            suggestions=_to_api_suggestions(suggestions_result.suggestions),
         )
 
     async def process_modification(
@@ -373,46 +413,46 @@ class Orchestrator:
         if not normalized_data:
             raise ValueError("No meal context found. Please analyze a meal first.")
         
-        normalized = NormalizedInput.model_validate(normalized_data)
+        # Flat model we serialized ourselves, so skip validation;
+        # VisionResult nests VisionDetected and still goes through model_validate
+        normalized = NormalizedInput.model_construct(**normalized_data)
         
         # Add modification to the ingredients list
         # Parse the modification - could be comma-separated items
         new_ingredients = [item.strip() for item in modification.split(',')]
         normalized.ingredients = normalized.ingredients + new_ingredients
         
-        # Build fresh user context including the modification
-        user_context = await self.build_user_context(modification)
+        # Build fresh user context; memory retrieval uses the whole meal (ingredients
+        # already include the modification), since "add mushrooms" alone matches little
+        meal_query = f"{normalized.meal_name or ''} {', '.join(normalized.ingredients)}".strip()
+        user_context = await self.build_user_context(meal_query or modification)
         
         # Add the modification to user context so suggestion agent knows about it
         user_context["modification_request"] = modification
         user_context["all_modifications"] = state.get("modifications", []) + [modification]
         
         # Regenerate suggestions with the modified input
-        suggestions_result = await self.suggestion_agent.suggest(
-            normalized_input=normalized,
-            user_context=user_context,
-        )
+        suggestions_result = await self._suggest(normalized, user_context)
         
         # Get vision result from session if available
         vision_result = None
         if state.get("vision_result"):
             vision_result = VisionResult.model_validate(state["vision_result"])
         
-        # Update session state with new suggestions (no images yet)
-        await db.upsert_session_state(session_id, self.user_id, {
+        # Patch only the keys that change with new suggestions (no images yet);
+        # vision_result, image_paths and original_text stay as stored.
+        # None removes suggestion_images so old images are not merged into the new set
+        await db.patch_session_state(session_id, {
             "step": "awaiting_selection",
             "last_input_kind": normalized.input_kind,
-            "vision_result": state.get("vision_result"),
             "normalized_input": normalized.model_dump(),
             "suggestions": [s.model_dump() for s in suggestions_result.suggestions],
-            "suggestion_images": {},
-            "image_paths": state.get("image_paths"),
-            "original_text": state.get("original_text"),
+            "suggestion_images": None,
             "modifications": state.get("modifications", []) + [modification],
         })
         
         # Start image generation in background
-        asyncio.create_task(self._generate_and_save_images(
+        spawn(self._generate_and_save_images(
             session_id, suggestions_result.suggestions
         ))
         
@@ -423,19 +463,7 @@ class Orchestrator:
                 input_kind=normalized.input_kind,
                 vision_result=vision_result,
             ),
-            suggestions=[
-                ApiSuggestion(
-                    suggestion_id=s.suggestion_id,
-                    title=s.title,
-                    summary=s.summary,
-                    health_rationale=s.health_rationale,
-                    tags=s.tags,
-                    estimated_time_minutes=s.estimated_time_minutes,
-                    difficulty=s.difficulty,
-                    image_url=None,
-                )
-                for s in suggestions_result.suggestions
-            ],
+            suggestions=_to_api_suggestions(suggestions_result.suggestions),
         )
 
     async def process_selection(
@@ -461,7 +489,7 @@ class Orchestrator:
         selected = None
         for s in suggestions:
             if s.get("suggestion_id") == suggestion_id:
-                selected = Suggestion.model_validate(s)
+                selected = Suggestion.model_construct(**s)
                 break
         
         if not selected:
@@ -472,7 +500,7 @@ class Orchestrator:
         local_image_url = suggestion_images.get(suggestion_id)
         
         # Get normalized input
-        normalized = NormalizedInput.model_validate(state.get("normalized_input", {}))
+        normalized = NormalizedInput.model_construct(**state.get("normalized_input", {}))
         
         # Build context
         user_context = await self.build_user_context(selected.title)
@@ -491,7 +519,7 @@ class Orchestrator:
         saved_image_path = None
         if local_image_url:
             # The image is already saved, extract the path from URL
-            # URL format: http://127.0.0.1:8080/images/{user_id}/{filename}
+            # URL format: {settings.image_url_prefix(user_id)}{filename}
             filename = local_image_url.split('/')[-1]
             saved_image_path = str(settings.user_images_dir(self.user_id) / filename)
         
@@ -501,14 +529,15 @@ class Orchestrator:
             user_id=self.user_id,
             title=recipe.name,
             source_kind=normalized.input_kind,
-            recipe_json=recipe.model_dump_json(),
+            recipe_json=orjson.dumps(recipe.model_dump(mode="json")).decode(),
             tags=selected.tags,
             input_text=state.get("original_text"),
             input_image_paths=state.get("image_paths"),
-            vision_result_json=json.dumps(state.get("vision_result")) if state.get("vision_result") else None,
+            vision_result_json=orjson.dumps(state["vision_result"]).decode() if state.get("vision_result") else None,
             suggestion_id=suggestion_id,
             generated_image_path=saved_image_path,
         )
+        invalidate_context(self.user_id)  # recent_meals changed
         
         # Update session state
         await db.upsert_session_state(session_id, self.user_id, {
@@ -541,24 +570,22 @@ class Orchestrator:
         if not meal:
             raise ValueError(f"Meal {meal_id} not found")
         
-        # Save outcome
-        await db.create_outcome(
-            meal_id=meal_id,
-            user_id=self.user_id,
-            liked=liked,
-            cooked_again=cooked_again,
-            tags=tags,
-            notes=notes,
-        )
+        vs = self.vector_store
         
-        # Get current preferences for context
-        preference_facts = await db.get_top_preference_facts(
-            self.user_id,
-            limit=settings.TOP_K_PREFERENCE_FACTS
+        # Save outcome while fetching current preferences and profile for context
+        _, preference_facts, profile = await asyncio.gather(
+            db.create_outcome(
+                meal_id=meal_id,
+                user_id=self.user_id,
+                liked=liked,
+                cooked_again=cooked_again,
+                tags=tags,
+                notes=notes,
+            ),
+            db.get_top_preference_facts(self.user_id, limit=settings.TOP_K_PREFERENCE_FACTS),
+            self._cached_profile(),
         )
         
-        profile = await db.get_profile(self.user_id)
-        
         # Step 5: Memory Update Agent
         memory_result = await self.memory_update_agent.process_feedback(
             meal_title=meal["title"],
@@ -572,36 +599,26 @@ class Orchestrator:
         )
         
         # Persist memory items
-        vs = self._get_vector_store()
-        for item in memory_result.memory_items:
-            memory_id = str(uuid.uuid4())
-            await db.create_memory_item(
-                memory_id=memory_id,
-                user_id=self.user_id,
-                kind=item.kind,
-                text=item.text,
-                salience=item.salience,
-                source_meal_id=meal_id,
-                embedding_id=memory_id,
-            )
-            # Add to vector store
-            try:
-                await vs.add_memory(
-                    memory_id=memory_id,
-                    text=item.text,
-                    metadata={"kind": item.kind, "meal_id": meal_id},
-                )
-            except Exception:
-                pass  # Vector store may fail, continue
+        memory_ids = _new_ids(len(memory_result.memory_items))
+        await db.create_memory_items_bulk(self.user_id, [
+            (memory_id, item.kind, item.text, item.salience, meal_id, memory_id)
+            for memory_id, item in zip(memory_ids, memory_result.memory_items)
+        ])
+        
+        # Add to vector store, embedding all items in one request
+        try:
+            await vs.add_memories([
+                (memory_id, item.text, {"kind": item.kind, "meal_id": meal_id})
+                for memory_id, item in zip(memory_ids, memory_result.memory_items)
+            ])
+        except Exception:
+            pass  # Vector store may fail, continue
         
         # Update preference facts
-        for fact in memory_result.preference_facts:
-            await db.update_preference_fact(
-                user_id=self.user_id,
-                fact_key=fact.fact_key,
-                delta=fact.delta_strength,
-                source_meal_id=meal_id,
-            )
+        await db.update_preference_facts_bulk(self.user_id, [
+            (fact.fact_key, fact.delta_strength, meal_id)
+            for fact in memory_result.preference_facts
+        ])
         
         # Apply profile patch
         if profile and (memory_result.profile_patch.likes_add or 
@@ -609,17 +626,21 @@ class Orchestrator:
             current_likes = profile.get("likes", [])
             current_dislikes = profile.get("dislikes", [])
             
-            new_likes = list(set(current_likes + memory_result.profile_patch.likes_add))
-            new_dislikes = list(set(current_dislikes + memory_result.profile_patch.dislikes_add))
-            
-            profile["likes"] = new_likes
-            profile["dislikes"] = new_dislikes
+            # Order-preserving dedup, so existing items keep their position
+            new_likes = list(dict.fromkeys(current_likes + memory_result.profile_patch.likes_add))
+            new_dislikes = list(dict.fromkeys(current_dislikes + memory_result.profile_patch.dislikes_add))
             
-            await db.upsert_profile(self.user_id, profile)
+            # Skip the write when every proposed item was already present
+            if new_likes != current_likes or new_dislikes != current_dislikes:
+                profile["likes"] = new_likes
+                profile["dislikes"] = new_dislikes
+                
+                await db.upsert_profile(self.user_id, profile)
+        
+        invalidate_context(self.user_id)
         
-        # Generate updated summary
-        updated_profile = await db.get_profile(self.user_id)
-        summary = self._generate_profile_summary(updated_profile)
+        # Generate updated summary from the in-memory profile, which now matches what was written
+        summary = self._generate_profile_summary(profile)
         
         return {
             "updated_profile_summary": summary,
@@ -0,0 +1,31 @@
+"""
+Request coalescing - concurrent callers for the same key share one computation
+"""
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+# In-flight computations by key
+_inflight: dict[str, asyncio.Task] = {}
+
+
+async def singleflight(key: str, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run coro_factory() at most once at a time per key.
+    
+    Callers arriving while a computation for the same key is running await
+    that computation instead of starting their own. Exceptions propagate to
+    every waiter. The shared task is shielded, so one caller being cancelled
+    does not cancel it for the others.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(coro_factory())
+        _inflight[key] = task
+
+        def _forget(done: asyncio.Task):
+            if _inflight.get(key) is done:
+                del _inflight[key]
+
+        task.add_done_callback(_forget)
+    return await asyncio.shield(task)
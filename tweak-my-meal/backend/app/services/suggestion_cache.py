@@ -0,0 +1,109 @@
+"""
+Semantic cache for Suggestion Agent results
+Hard constraints (input kind, time, allergies, diet, ...) must match exactly;
+the meal/ingredients part matches by embedding similarity, so near-duplicate
+requests reuse a recent result instead of a new LLM generation
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..schemas.agents import NormalizedInput
+from .openai_client import openai_client
+from .vector_store import cosine_similarity
+
+
+# Minimum cosine similarity for a cached result to count as a match
+SIMILARITY_THRESHOLD = 0.92
+MAX_ENTRIES_PER_USER = 256
+# Preference facts and memories also shape suggestions, so entries expire
+ENTRY_TTL_SECONDS = 3600
+
+
+def suggestion_cache_key(normalized: NormalizedInput, user_context: dict) -> tuple[str, str]:
+    """(scope, text) for a suggestion request: scope must match exactly, text is compared semantically"""
+    profile = user_context.get("profile", {})
+    scope = json.dumps([
+        normalized.input_kind,
+        normalized.max_time_minutes or profile.get("time_per_meal_minutes"),
+        sorted(profile.get("allergies", [])),
+        sorted(profile.get("dislikes", [])),
+        sorted(profile.get("equipment", [])),
+        profile.get("diet_style"),
+        profile.get("cooking_skill"),
+        user_context.get("all_modifications", []),
+    ])
+    ingredients = sorted({i.strip().lower() for i in normalized.ingredients if i.strip()})
+    text = f"{(normalized.meal_name or '').strip().lower()} | {', '.join(ingredients)}"
+    return scope, text
+
+
+class SuggestionCache:
+    """Per-user LRU of suggestion results"""
+
+    def __init__(self, maxsize: int = MAX_ENTRIES_PER_USER):
+        self.maxsize = maxsize
+        # "{scope}\n{text}" -> {scope, embedding, result, stored_at}, least recently used first
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+
+    def _expire(self):
+        cutoff = time.monotonic() - ENTRY_TTL_SECONDS
+        for key in [k for k, e in self._entries.items() if e["stored_at"] < cutoff]:
+            del self._entries[key]
+
+    async def lookup(self, scope: str, text: str) -> tuple[Optional[dict], Optional[list[float]]]:
+        """
+        Find a cached result for this request.
+
+        Returns (result, embedding); on a miss the embedding computed for the
+        lookup is returned so store() can reuse it.
+        """
+        self._expire()
+        key = f"{scope}\n{text}"
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+            return entry["result"], None
+
+        candidates = [(k, e) for k, e in self._entries.items() if e["scope"] == scope and e["embedding"]]
+        try:
+            embedding = await openai_client.embed_single(text)
+        except Exception as e:
+            print(f"Warning: Suggestion cache embedding failed: {e}")
+            return None, None
+
+        best_key, best_score = None, 0.0
+        for candidate_key, candidate in candidates:
+            score = cosine_similarity(embedding, candidate["embedding"])
+            if score > best_score:
+                best_key, best_score = candidate_key, score
+
+        if best_key and best_score >= SIMILARITY_THRESHOLD:
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key]["result"], embedding
+        return None, embedding
+
+    def store(self, scope: str, text: str, embedding: Optional[list[float]], result: dict):
+        """Cache a result, evicting the least recently used entry when full"""
+        key = f"{scope}\n{text}"
+        self._entries[key] = {
+            "scope": scope,
+            "embedding": embedding,
+            "result": result,
+            "stored_at": time.monotonic(),
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+# Cache of suggestion caches per user
+_suggestion_caches: dict[str, SuggestionCache] = {}
+
+
+def get_suggestion_cache(user_id: str) -> SuggestionCache:
+    """Get or create suggestion cache for user"""
+    if user_id not in _suggestion_caches:
+        _suggestion_caches[user_id] = SuggestionCache()
+    return _suggestion_caches[user_id]
@@ -0,0 +1,168 @@
+"""
+Semantic cache for per-meal journal tips
+Exact match on the normalized meal title, then embedding similarity so
+near-duplicate titles ("Chicken Caesar Salad" / "chicken caesar salad!")
+reuse the same tip instead of asking the model again
+"""
+import asyncio
+import json
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+import numpy as np
+
+from ..config import settings
+from .openai_client import openai_client
+
+
+# Minimum cosine similarity for a cached tip to count as a match
+SIMILARITY_THRESHOLD = 0.92
+# Titles kept; the oldest are dropped beyond this
+MAX_ENTRIES = 2000
+# The JSONL file is rewritten from memory once it holds this many lines
+COMPACT_AFTER_LINES = 2 * MAX_ENTRIES
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase and collapse punctuation/whitespace so trivial variants match"""
+    return re.sub(r"\W+", " ", title.lower()).strip()
+
+
+class TipCache:
+    """File-backed (JSONL) tip cache keyed by normalized meal title, loaded on first use"""
+
+    def __init__(self, path: Path):
+        self._path = path
+        # normalized title -> {tip, embedding}, oldest first
+        self._entries: dict[str, dict] = {}
+        self._keys: list[str] = []  # titles with an embedding, in matrix row order
+        self._matrix: Optional[np.ndarray] = None  # unit-normalized rows, rebuilt lazily
+        self._file_lines = 0  # lines in the file, including superseded ones
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self):
+        """Load cached tips from disk once, without blocking the event loop"""
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            try:
+                if self._path.exists():
+                    async with aiofiles.open(self._path, "r") as f:
+                        async for line in f:
+                            if line.strip():
+                                entry = json.loads(line)
+                                self._remember(entry["title"], entry["tip"], entry.get("embedding"))
+                                self._file_lines += 1
+            except Exception as e:
+                print(f"Warning: Failed to load tip cache: {e}")
+            self._loaded = True
+
+    def _remember(self, key: str, tip: dict, embedding: Optional[list[float]]):
+        self._entries.pop(key, None)
+        self._entries[key] = {"tip": tip, "embedding": embedding}
+        while len(self._entries) > MAX_ENTRIES:
+            del self._entries[next(iter(self._entries))]
+        self._matrix = None
+
+    def _best_match(self, embedding: list[float]) -> Optional[dict]:
+        """Cached tip for the most similar title, if it clears the threshold"""
+        if self._matrix is None:
+            self._keys = [k for k, e in self._entries.items() if e["embedding"]]
+            if not self._keys:
+                return None
+            matrix = np.asarray([self._entries[k]["embedding"] for k in self._keys], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.where(norms == 0, 1, norms)
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        scores = self._matrix @ (query / norm)
+        best = int(np.argmax(scores))
+        if scores[best] >= SIMILARITY_THRESHOLD:
+            return self._entries[self._keys[best]]["tip"]
+        return None
+
+    async def lookup(self, titles: list[str]) -> tuple[dict[str, dict], dict[str, list[float]]]:
+        """
+        Find cached tips for titles.
+
+        Returns (hits, embeddings): tips keyed by the original title, and the
+        embeddings computed for the remaining misses so store_many() can reuse them.
+        Titles still needing a tip are those in neither dict.
+        """
+        await self._ensure_loaded()
+        hits = {}
+        pending = []
+        for title in dict.fromkeys(titles):
+            entry = self._entries.get(normalize_title(title))
+            if entry:
+                hits[title] = entry["tip"]
+            else:
+                pending.append(title)
+
+        embeddings = {}
+        if not pending:
+            return hits, embeddings
+
+        try:
+            vectors = await openai_client.embed(pending)
+        except Exception as e:
+            print(f"Warning: Tip cache embedding failed: {e}")
+            return hits, embeddings
+
+        for title, vector in zip(pending, vectors):
+            tip = self._best_match(vector)
+            if tip:
+                hits[title] = tip
+            else:
+                embeddings[title] = vector
+
+        return hits, embeddings
+
+    async def store_many(self, items: list[tuple[str, dict, Optional[list[float]]]]):
+        """Cache generated (title, tip, embedding) entries and persist them in one write"""
+        await self._ensure_loaded()
+        async with self._lock:
+            lines = []
+            for title, tip, embedding in items:
+                key = normalize_title(title)
+                if key in self._entries:
+                    continue  # a concurrent request already stored this title
+                self._remember(key, tip, embedding)
+                lines.append(json.dumps({"title": key, "tip": tip, "embedding": embedding}) + "\n")
+            if not lines:
+                return
+
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                if self._file_lines + len(lines) > COMPACT_AFTER_LINES:
+                    await self._compact()
+                else:
+                    async with aiofiles.open(self._path, "a") as f:
+                        await f.write("".join(lines))
+                    self._file_lines += len(lines)
+            except Exception as e:
+                print(f"Warning: Failed to persist tip cache: {e}")
+
+    async def _compact(self):
+        """Rewrite the file with only the entries currently kept"""
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        async with aiofiles.open(tmp_path, "w") as f:
+            await f.write("".join(
+                json.dumps({"title": key, "tip": e["tip"], "embedding": e["embedding"]}) + "\n"
+                for key, e in self._entries.items()
+            ))
+        os.replace(tmp_path, self._path)
+        self._file_lines = len(self._entries)
+
+
+# Singleton instance - tips depend only on the meal title, so it is shared across users
+tip_cache = TipCache(settings.DATA_ROOT / "cache" / "tips.jsonl")
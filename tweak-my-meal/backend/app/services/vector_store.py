@@ -71,6 +71,25 @@ class VectorStore:
         
         return memory_id
 
+    async def add_memories(self, items: list[tuple[str, str, Optional[dict]]]) -> list[str]:
+        """Add (memory_id, text, metadata) items using a single embeddings request"""
+        if not items:
+            return []
+        try:
+            embeddings = await openai_client.embed([text for _, text, _ in items])
+            
+            for (memory_id, text, metadata), embedding in zip(items, embeddings):
+                self._memories[memory_id] = {
+                    "text": text,
+                    "embedding": embedding,
+                    "metadata": metadata or {},
+                }
+            self._save()
+        except Exception as e:
+            print(f"Warning: Failed to add memories: {e}")
+        
+        return [memory_id for memory_id, _, _ in items]
+
     async def search(
         self,
         query: str,
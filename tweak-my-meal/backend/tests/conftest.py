@@ -0,0 +1,4 @@
+import os
+
+# The OpenAI client is created at import time and needs some key; tests never call the API
+os.environ.setdefault("OPEN_AI_KEY", "test-key")
@@ -0,0 +1,74 @@
+"""
+Conversation router - history trimming without a tokenizer
+"""
+import asyncio
+
+import pytest
+import tiktoken
+
+from app.routers import conversation
+
+
+class FakeDb:
+    """Just enough of Database for send_message"""
+
+    def __init__(self):
+        self.states = {}
+
+    async def ensure_user(self, user_id):
+        return ""
+
+    async def get_session_state(self, session_id):
+        return self.states.get(session_id)
+
+    async def upsert_session_state(self, session_id, user_id, state):
+        self.states[session_id] = state
+
+    async def get_profile(self, user_id):
+        return {"display_name": "Sam"}
+
+    async def get_top_preference_facts(self, user_id, limit=10):
+        return []
+
+
+@pytest.fixture
+def offline_tokenizer(monkeypatch):
+    """tiktoken cannot load (e.g. the BPE download is blocked)"""
+    def fail(*args, **kwargs):
+        raise ConnectionError("network blocked")
+
+    monkeypatch.setattr(tiktoken, "encoding_for_model", fail)
+    monkeypatch.setattr(tiktoken, "get_encoding", fail)
+    conversation.load_encoding.cache_clear()
+    yield
+    conversation.load_encoding.cache_clear()
+
+
+def test_send_message_answers_without_tokenizer(monkeypatch, offline_tokenizer):
+    db = FakeDb()
+    sent = []
+
+    async def fake_get_db(user_id):
+        return db
+
+    async def fake_chat(messages, **kwargs):
+        sent.append(messages)
+        return "Hi Sam!"
+
+    monkeypatch.setattr(conversation, "get_db", fake_get_db)
+    monkeypatch.setattr(conversation.openai_client, "chat", fake_chat)
+
+    response = asyncio.run(conversation.send_message(
+        conversation.SendMessageRequest(user_id="user_test", message="Hello <|endoftext|>")
+    ))
+
+    assert response.ok
+    assert response.data["message"]["content"] == "Hi Sam!"
+    assert sent[0][-1]["content"] == "Hello <|endoftext|>"
+
+
+def test_trim_history_estimates_from_characters(offline_tokenizer):
+    messages = [{"role": "user", "content": "x" * 400} for _ in range(5)]
+
+    # ~100 estimated tokens each, so a 250 token budget keeps the last two
+    assert conversation._trim_history(messages, 250) == messages[-2:]
@@ -0,0 +1,18 @@
+"""
+OpenAI client - which base URLs vision may send image links for
+"""
+import pytest
+
+from app.services.openai_client import _is_internet_host
+
+
+@pytest.mark.parametrize("host", [
+    None, "localhost", "127.0.0.1", "::1", "192.168.1.5", "10.0.0.2", "169.254.1.1", "box.local",
+])
+def test_local_hosts_are_not_internet_reachable(host):
+    assert not _is_internet_host(host)
+
+
+@pytest.mark.parametrize("host", ["api.example.com", "8.8.8.8"])
+def test_public_hosts_are_internet_reachable(host):
+    assert _is_internet_host(host)